@@ -1,9 +1,6 @@
 from bisect import bisect
-
-
-def deepcopy(lst):
-    return [l[:] for l in lst]
-
+from collections import namedtuple
+from random import Random
 
 DICT1 = {'s': 0, 'h': 1, 'c': 2, 'd': 3}
 DICT2 = {0: 's', 1: 'h', 2: 'c', 3: 'd'}
@@ -12,6 +9,22 @@ LINE = 8
 # FREECELL = 3
 # LINE = 10
 
+# A position is immutable: goals and freecells are sorted tuples of card
+# ids and columns a tuple of tuples, ordered by their first card, so that a
+# child shares every column it does not touch with its parent.
+#
+# `key` is a 64-bit Zobrist key. A card is either in a freecell, on a goal,
+# or in a column on top of some card or of the table, so the XOR of
+# ZOBRIST[card][card below] over the columns and of ZOBRIST[card][FREE]
+# over the freecells tells positions apart, and a move only changes the
+# term of the one card whose place changes.
+State = namedtuple('State', ['goals', 'freecells', 'columns', 'key'])
+
+TABLE = 0  # below the first card of a column
+FREE = 1  # card ids start at 4, so 1 to 3 are free
+_random = Random(20180214)
+ZOBRIST = [[_random.getrandbits(64) for _ in range(56)] for _ in range(56)]
+
 
 def str2id(card_str):
     return (DICT1[card_str[0]]) + (int(card_str[1:]) << 2)
@@ -21,18 +34,33 @@ def id2str(card_id):
     return DICT2[card_id & 3] + str(card_id >> 2)
 
 
+def make_state(goals, freecells, columns):
+    """A `State` with its key computed from scratch."""
+    columns = tuple(sorted(tuple(line) for line in columns if line))
+    key = 0
+    for c in freecells:
+        key ^= ZOBRIST[c][FREE]
+    for line in columns:
+        below = TABLE
+        for c in line:
+            key ^= ZOBRIST[c][below]
+            below = c
+    return State(tuple(goals), tuple(sorted(freecells)), columns, key)
+
+
 def hash_board(board):
-    s = ''
-    for line in board:
-        s += ''.join(id2str(c) for c in line) + '\n'
-    return s
+    return board.key
+
+
+def is_solved(board):
+    return sum(board.goals) == 230
 
 
 def print_board(board):
-    s = 'Goals: {}\n'.format([id2str(c - 4) for c in board[0]])
-    s += 'Freecells: {}\n'.format([id2str(c) for c in board[1]])
+    s = 'Goals: {}\n'.format([id2str(c - 4) for c in board.goals])
+    s += 'Freecells: {}\n'.format([id2str(c) for c in board.freecells])
 
-    for line in board[2:]:
+    for line in board.columns:
         s += ','.join(id2str(c) for c in line) + '\n'
     print(s)
 
@@ -42,10 +70,86 @@ def is_valid(c1, c2):
     return c2 // 4 + 1 == c1 // 4 and c1 % 2 != c2 % 2
 
 
-def valid_moves(board):
-    goals = board[0]
-    freecells = board[1]
-    board = board[2:]
+def _to_goal(goals, c):
+    s = c & 3
+    return goals[:s] + (goals[s] + 4, ) + goals[s + 1:]
+
+
+def _insert(cells, c):
+    k = bisect(cells, c)
+    return cells[:k] + (c, ) + cells[k:]
+
+
+def _below(line, idx):
+    return line[idx - 1] if idx else TABLE
+
+
+def _safe_ranks(goals):
+    """
+    The highest rank that is safe to play home, for black and for red
+    cards: a card can go once both cards of the other colour one rank below
+    are home, as nothing could ever be put on it then.
+    """
+    return (min(goals[1], goals[3]) >> 2, min(goals[0], goals[2]) >> 2)
+
+
+def is_safe(goals, c):
+    return c in goals and c >> 2 <= _safe_ranks(goals)[c & 1]
+
+
+def auto_play(board):
+    """
+    Plays safe goal moves from the freecells and the columns until there is
+    none left. Returns the new board and the cards played, in order.
+    """
+    goals, freecells, columns, key = board
+    played = []
+    while True:
+        safe = _safe_ranks(goals)
+        for i, c in enumerate(freecells):
+            if c in goals and c >> 2 <= safe[c & 1]:
+                freecells = freecells[:i] + freecells[i + 1:]
+                key ^= ZOBRIST[c][FREE]
+                break
+        else:
+            for j, line in enumerate(columns):
+                c = line[-1]
+                if c in goals and c >> 2 <= safe[c & 1]:
+                    if len(line) == 1:
+                        columns = columns[:j] + columns[j + 1:]
+                    else:
+                        columns = columns[:j] + (line[:-1], ) + columns[j + 1:]
+                    key ^= ZOBRIST[c][_below(line, len(line) - 1)]
+                    break
+            else:
+                if not played:
+                    return board, played
+                return State(goals, freecells, columns, key), played
+        goals = _to_goal(goals, c)
+        played.append(c)
+
+
+def goal_label(played):
+    return '{} to Goal'.format(', '.join(id2str(c) for c in played))
+
+
+def valid_moves(board, auto=False):
+    """
+    Yields every (board, move) reachable in one move. With `auto`, the safe
+    goal moves are then played on each child, see `auto_play`.
+    """
+    if not auto:
+        yield from _valid_moves(board)
+        return
+    for b, move in _valid_moves(board):
+        b, played = auto_play(b)
+        if played:
+            move = f'{move}, then {goal_label(played)}'
+        yield b, move
+
+
+def _valid_moves(board):
+    goals, freecells, board, key = board
 
     m = len(board)
     empty = LINE - m
@@ -56,44 +160,42 @@ def valid_moves(board):
     for i in range(len(freecells)):
         c = freecells[i]
         if c in goals:
-            tmp_goals = goals.copy()
-            tmp_goals[c & 3] += 4
-            yield [tmp_goals, freecells[:i] + freecells[i + 1:]
-                   ] + board, f'Move {id2str(c)} to Goal'
+            yield State(_to_goal(goals, c), freecells[:i] + freecells[i + 1:],
+                        board, key ^ ZOBRIST[c][FREE]
+                        ), f'Move {id2str(c)} to Goal'
 
     # from board to goals
     for j in range(m):
         line = board[j]
         c = line[-1]
         if c in goals:
-            tmp_board = deepcopy(board)
-            tmp_board[j].pop(-1)
-            if len(tmp_board[j]) == 0:
-                tmp_board = tmp_board[:j] + tmp_board[j + 1:]
-            tmp_goals = goals.copy()
-            tmp_goals[c & 3] += 4
-            yield [tmp_goals, freecells
-                   ] + tmp_board, f'Move {id2str(c)} to Goal'
+            if len(line) == 1:
+                tmp_board = board[:j] + board[j + 1:]
+            else:
+                tmp_board = board[:j] + (line[:-1], ) + board[j + 1:]
+            yield State(_to_goal(goals, c), freecells, tmp_board,
+                        key ^ ZOBRIST[c][_below(line, len(line) - 1)]
+                        ), f'Move {id2str(c)} to Goal'
 
     # from freecells to board
     for i in range(len(freecells)):
         c = freecells[i]
+        tmp_freecells = freecells[:i] + freecells[i + 1:]
         for k in range(m):
             line = board[k]
             if is_valid(line[-1], c):
-                tmp_board = deepcopy(board)
-                tmp_board[k].append(c)
-                yield [
-                    goals, freecells[:i] + freecells[i + 1:]
-                ] + tmp_board, f'Move {id2str(c)} after {id2str(line[-1])}'
+                tmp_board = board[:k] + (line + (c, ), ) + board[k + 1:]
+                yield State(goals, tmp_freecells, tmp_board,
+                            key ^ ZOBRIST[c][FREE] ^ ZOBRIST[c][line[-1]]
+                            ), f'Move {id2str(c)} after {id2str(line[-1])}'
 
         # to an empty line
         if empty > 0:
-            tmp_board = deepcopy(board)
             k = bisect([line[0] for line in board], c)
-            tmp_board = tmp_board[:k] + [[c]] + tmp_board[k:]
-            yield [goals, freecells[:i] + freecells[i + 1:]
-                   ] + tmp_board, f'Move {id2str(c)} to an empty line'
+            tmp_board = board[:k] + ((c, ), ) + board[k:]
+            yield State(goals, tmp_freecells, tmp_board,
+                        key ^ ZOBRIST[c][FREE] ^ ZOBRIST[c][TABLE]
+                        ), f'Move {id2str(c)} to an empty line'
 
     # from board to board
     for j in range(m):
@@ -101,25 +203,26 @@ def valid_moves(board):
         idx = len(line) - 1
         while len(line) - idx <= moves:
             c = line[idx]
+            old = ZOBRIST[c][_below(line, idx)]
             for k in range(m):
                 if k != j and is_valid(board[k][-1], c):
-                    tmp_board = deepcopy(board)
-                    tmp_board[k] += line[idx:]
+                    tmp_board = list(board)
+                    tmp_board[k] = board[k] + line[idx:]
                     tmp_board[j] = line[:idx]
                     if idx == 0:
-                        tmp_board = tmp_board[:j] + tmp_board[j + 1:]
+                        del tmp_board[j]
 
-                    yield [
-                        goals, freecells
-                    ] + tmp_board, f'Move {id2str(c)} after {id2str(board[k][-1])}'
+                    yield State(goals, freecells, tuple(tmp_board),
+                                key ^ old ^ ZOBRIST[c][board[k][-1]]
+                                ), f'Move {id2str(c)} after {id2str(board[k][-1])}'
 
             if empty > 0 and idx > 0 and (len(line) - idx) <= (moves // 2):
-                tmp_board = deepcopy(board)
-                tmp_board[j] = line[:idx]
-                k = bisect([ln[0] for ln in board], c)
-                tmp_board = tmp_board[:k] + [line[idx:]] + tmp_board[k:]
-                yield [goals, freecells
-                       ] + tmp_board, f'Move {id2str(c)} to an empty line'
+                tmp_board = board[:j] + (line[:idx], ) + board[j + 1:]
+                k = bisect([ln[0] for ln in tmp_board], c)
+                tmp_board = tmp_board[:k] + (line[idx:], ) + tmp_board[k:]
+                yield State(goals, freecells, tmp_board,
+                            key ^ old ^ ZOBRIST[c][TABLE]
+                            ), f'Move {id2str(c)} to an empty line'
 
             if idx == 0 or not is_valid(line[idx - 1], c):
                 break
@@ -128,12 +231,13 @@ def valid_moves(board):
     # from board to freecell
     if len(freecells) < FREECELL:
         for j in range(m):
-            tmp_board = deepcopy(board)
-            c = tmp_board[j].pop(-1)
-            if len(tmp_board[j]) == 0:
-                tmp_board = tmp_board[:j] + tmp_board[j + 1:]
-
-            tmp_freecells = freecells + [c]
-            tmp_freecells.sort()
-            yield [goals, tmp_freecells
-                   ] + tmp_board, f'Move {id2str(c)} to freecell'
+            line = board[j]
+            c = line[-1]
+            if len(line) == 1:
+                tmp_board = board[:j] + board[j + 1:]
+            else:
+                tmp_board = board[:j] + (line[:-1], ) + board[j + 1:]
+
+            yield State(goals, _insert(freecells, c), tmp_board,
+                        key ^ ZOBRIST[c][_below(line, len(line) - 1)] ^
+                        ZOBRIST[c][FREE]), f'Move {id2str(c)} to freecell'
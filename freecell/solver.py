@@ -1,31 +1,70 @@
-from board import valid_moves, hash_board, str2id, print_board
+from board import (valid_moves, hash_board, is_solved, make_state, str2id,
+                   print_board, auto_play, goal_label)
 
+# Play safe goal moves as soon as they are available.
+AUTO_PLAY = True
 
-def dfs(board):
-    mem = {hash_board(board)}
+
+def rebuild(board, parents, key, auto=False):
+    """
+    The (move, board) pairs leading from board to the state of key, found
+    by following the parent keys back and replaying their moves.
+    """
+    keys = []
+    while parents[key] is not None:
+        keys.append(key)
+        key = parents[key][0]
+
+    solution = []
+    for key in reversed(keys):
+        board = next(b for b, _ in valid_moves(board, auto)
+                     if hash_board(b) == key)
+        solution.append((parents[key][1], board))
+    return solution
+
+
+def dfs(board, auto=False, verbose=False):
+    """
+    Depth-first search for a solution, as (move, board) pairs. With `auto`,
+    safe goal moves are played as soon as they are available, see
+    `board.auto_play`. With `verbose`, the goals reached are printed.
+    """
+    solution = []
+    if auto:
+        board, played = auto_play(board)
+        if played:
+            solution.append((f'Move {goal_label(played)}', board))
+        if is_solved(board):
+            return solution
+
+    # The parent key and the move of every state seen, by key.
+    parents = {hash_board(board): None}
     # count = 1
     # max_goal = sum(board[0])
-    stack = [[board, []]]
+    start = board
+    stack = [board]
 
     while stack:
-        board, solution = stack.pop(-1)
+        board = stack.pop(-1)
+        key = hash_board(board)
         # count += 1
 
         # if count % 10000 == 0:
-        # print(count, max_goal, len(mem))
+        # print(count, max_goal, len(parents))
         # print_board(board)
 
-        for b, move in list(valid_moves(board))[::-1]:
-            if hash_board(b) in mem:
+        for b, move in list(valid_moves(board, auto))[::-1]:
+            if hash_board(b) in parents:
                 continue
-            if sum(b[0]) == 230:
-                print(b[0])
-                return solution + [(move, b)]
+            parents[hash_board(b)] = (key, move)
+            if is_solved(b):
+                if verbose:
+                    print(b.goals)
+                return solution + rebuild(start, parents, hash_board(b), auto)
 
-            mem.add(hash_board(b))
             # max_goal = max(sum(b[0]), max_goal)
 
-            stack.append([b, solution + [(move, b)]])
+            stack.append(b)
 
 
 if __name__ == '__main__':
@@ -36,11 +75,10 @@ if __name__ == '__main__':
             for ch in line.strip().split(' '):
                 board_line.append(str2id(ch))
             board.append(board_line)
-    board.sort(key=lambda x: x[0])
-    board = [list(range(4, 8)), []] + board
+    board = make_state(range(4, 8), [], board)
 
     print_board(board)
-    for idx, (move, board) in enumerate(dfs(board)):
+    for idx, (move, board) in enumerate(dfs(board, AUTO_PLAY, verbose=True)):
         print(idx, move)
         print_board(board)
         input()
@@ -0,0 +1,67 @@
+import unittest
+from board import (str2id, make_state, is_solved, is_safe, auto_play,
+                   valid_moves, hash_board)
+from solver import dfs
+
+
+def load_board(name):
+    with open(f'boards/{name}.txt', 'r') as f:
+        board = [[str2id(ch) for ch in line.strip().split(' ')]
+                 for line in f if line.strip()]
+    return make_state(range(4, 8), [], board)
+
+
+class TestAutoPlay(unittest.TestCase):
+    def test_safe_rule(self):
+        # Aces are always safe, and so are twos once the other colour's
+        # aces are home.
+        goals = tuple(range(4, 8))
+        self.assertTrue(is_safe(goals, str2id('s1')))
+        self.assertFalse(is_safe(goals, str2id('s2')))
+        goals = (str2id('s2'), str2id('h2'), str2id('c1'), str2id('d2'))
+        self.assertTrue(is_safe(goals, str2id('s2')))
+        self.assertFalse(is_safe(goals, str2id('h2')))
+        self.assertFalse(is_safe(goals, str2id('s3')))
+
+    def test_keys(self):
+        board = load_board('3771429')
+        for b, _ in valid_moves(board, auto=True):
+            b2 = make_state(b.goals, b.freecells, b.columns)
+            self.assertEqual(hash_board(b), hash_board(b2))
+
+    def test_auto_play(self):
+        board = make_state((str2id('s2'), str2id('h2'), str2id('c2'),
+                            str2id('d1')),
+                           [str2id('d1')],
+                           [[str2id('c3'), str2id('h2')], [str2id('s2')]])
+        board, played = auto_play(board)
+        self.assertEqual(played, [str2id('d1'), str2id('s2'), str2id('h2')])
+        self.assertEqual(board.columns, ((str2id('c3'), ), ))
+        self.assertEqual(board.freecells, ())
+
+    def replay(self, board, solution, auto):
+        """Checks that every step of solution is a move from the one before."""
+        if auto:
+            board, played = auto_play(board)
+            if played:
+                self.assertEqual(hash_board(solution[0][1]), hash_board(board))
+                solution = solution[1:]
+        for _, b in solution:
+            keys = [hash_board(c) for c, _ in valid_moves(board, auto)]
+            self.assertIn(hash_board(b), keys)
+            board = b
+        return board
+
+    def test_solvable(self):
+        # Safe goal moves never lose a solution: both modes solve the same
+        # boards, and the solutions replay to a won position.
+        for name in ['1887942', '2980204', '3771429']:
+            for auto in (False, True):
+                board = load_board(name)
+                solution = dfs(board, auto=auto)
+                self.assertIsNotNone(solution, (name, auto))
+                self.assertTrue(is_solved(self.replay(board, solution, auto)))
+
+
+if __name__ == '__main__':
+    unittest.main()
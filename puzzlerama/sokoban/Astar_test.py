@@ -1,7 +1,9 @@
 from load_map import load_map
 from algorithms.Astar import Astar_search
+from patterns import load_patterns
 
 board, boxes, player = load_map('maps/pkuhelper.txt')
+load_patterns(board)
 board.print_board(boxes, player)
 
 path = Astar_search(board, boxes, player)
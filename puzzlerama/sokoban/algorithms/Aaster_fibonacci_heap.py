@@ -32,9 +32,10 @@ class FibonacciNode:
 
 
 class FibonacciHeap:
-    def __init__(self, node=None):
+    def __init__(self, node=None, state_set=None):
         self.cache = dict()
-        self.state_set = StateSet()
+        self.state_set = state_set if state_set is not None else StateSet(
+            keyed=True)
 
         if node:
             self.num_key = 1
@@ -49,6 +50,14 @@ class FibonacciHeap:
     def is_empty(self):
         return self.num_key == 0
 
+    def __len__(self):
+        return self.num_key
+
+    def peek(self):
+        """The value with the smallest f-score, left in the heap."""
+        if self.min_node is not None:
+            return self.min_node.value
+
     def look_up(self, item):
         return self.state_set.look_up(item)
 
@@ -76,15 +85,22 @@ class FibonacciHeap:
             if self.min_node > h2.min_node:
                 self.min_node = h2.min_node
 
-    def add(self, boxes, norm_pos, reachable, moves, gscore, fscore):
+    def add(self,
+            boxes,
+            norm_pos,
+            reachable,
+            moves,
+            gscore,
+            fscore,
+            assignment=None):
         # print(f'Add {(boxes, norm_pos)}')
         value = {
             'boxes': boxes,
             'norm_pos': norm_pos,
-            'reachable': reachable,
             'moves': moves,
             'gscore': gscore,
-            'fscore': fscore
+            'fscore': fscore,
+            'assignment': assignment
         }
 
         self.state_set.update(boxes, norm_pos, reachable)
@@ -92,7 +108,7 @@ class FibonacciHeap:
         node = FibonacciNode(value)
         self.cache[node._key] = node
 
-        h = FibonacciHeap(node)
+        h = FibonacciHeap(node, self.state_set)
         self.merge(h)
 
     def pop(self):
@@ -121,12 +137,11 @@ class FibonacciHeap:
                 sibling.left = z
                 sibling.right = min_right
                 min_right.left = sibling
+                sibling.parent = None
 
                 min_right = sibling
                 sibling = sibling_right
 
-                sibling.parent = None
-
         z.left.right = z.right
         z.right.left = z.left
 
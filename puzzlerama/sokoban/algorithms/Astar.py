@@ -1,18 +1,78 @@
+from math import inf
+from time import perf_counter
+
 from .stateset import StateSet
 from .Aaster_fibonacci_heap import FibonacciHeap
+from .binary_heap import BinaryHeap
+from .bucket_queue import BucketQueue
+from .stats import new_stats, observe
+from .budget import Budget
+from board import bits
 
-import numpy as np
 from scipy.optimize import linear_sum_assignment
 
+QUEUES = {
+    'fibonacci': FibonacciHeap,
+    'binary': BinaryHeap,
+    'bucket': BucketQueue,
+}
+
 
-def heuristic(goals, boxes):
-    goals, boxes = list(goals), list(boxes)
-    assert len(goals) == len(boxes)
+def assignment(board, boxes):
+    """
+    Minimal matching of boxes to goals under the push distance table.
+    Returns its cost and the matching as a dict from box square to goal
+    column of `board.push_dist`.
+    """
+    boxes = list(bits(boxes))
+    assert len(board.goal_list) == len(boxes)
 
-    dists = np.array([[b.dist(g) for g in goals] for b in boxes])
+    dists = board.push_dist[boxes]
     row_ind, col_ind = linear_sum_assignment(dists)
 
-    return dists[row_ind, col_ind].sum()
+    return int(dists[row_ind, col_ind].sum()), dict(
+        zip(boxes, col_ind.tolist()))
+
+
+def heuristic(board, boxes):
+    return assignment(board, boxes)[0]
+
+
+def update_assignment(board, boxes, hscore, parent_assignment, box, d):
+    """
+    Repairs the optimal matching of the parent state after `box` has been
+    pushed by `d`, `boxes` being the child configuration.
+
+    Only the row of the pushed box changes, so every matching of the child
+    costs at least `hscore + min(dist[box + d] - dist[box])`. The parent
+    matching, then the best single swap of goals with another box, are
+    returned as soon as they reach this bound; otherwise the matching is
+    solved from scratch.
+    """
+    dist = board.push_dist
+    new_box = box + d
+    delta = dist[new_box] - dist[box]
+    lower = hscore + int(delta.min())
+
+    matching = dict(parent_assignment)
+    goal = matching.pop(box)
+    matching[new_box] = goal
+    cost = hscore + int(delta[goal])
+    if cost == lower:
+        return cost, matching
+
+    best, best_box = 0, None
+    for other, other_goal in matching.items():
+        change = (dist[new_box, other_goal] + dist[other, goal] -
+                  dist[new_box, goal] - dist[other, other_goal])
+        if change < best:
+            best, best_box = change, other
+    if best_box is not None and cost + best == lower:
+        matching[new_box] = matching[best_box]
+        matching[best_box] = goal
+        return lower, matching
+
+    return assignment(board, boxes)
 
 
 def reconstruct_path(cameFrom, current):
@@ -23,51 +83,154 @@ def reconstruct_path(cameFrom, current):
     return total_path
 
 
-def Astar_search(board, boxes, player):
+def check_weight(queue, weight):
+    """
+    The weight of the heuristic, as an int if it is a whole number. The
+    bucket queue indexes f-scores, so it only takes whole weights.
+    """
+    if float(weight).is_integer():
+        return int(weight)
+    if QUEUES.get(queue, queue) is BucketQueue:
+        raise ValueError(
+            f'the bucket queue needs an integer weight, got {weight}')
+    return weight
+
+
+def Astar_search(board, boxes, player, queue='fibonacci', stats=None,
+                 weight=1, max_nodes=None, max_seconds=None,
+                 max_memory=None, observer=None):
+    """
+    `queue` is the name of an open set backend in `QUEUES`, or a class with
+    the same interface as `FibonacciHeap`. If `stats` is a dict, the
+    counters of `new_stats` are kept there. An `Observer` is given
+    snapshots of them as the search goes.
+
+    A `weight` above 1 multiplies the heuristic (weighted A*): the first
+    solution is found much sooner but may take up to `weight` times the
+    optimal number of pushes. The bucket queue needs an integer weight.
+    The search gives up and returns None once one of the `Budget` limits
+    `max_nodes`, `max_seconds` or `max_memory` (MB) is reached; the limit
+    is then recorded in `stats['exhausted']`.
+    """
+    weight = check_weight(queue, weight)
+    budget = Budget(max_nodes, max_seconds, max_memory)
+    stats = new_stats(stats)
+    with observe(observer, board, stats):
+        for path in _Astar_search(board, *board.encode(boxes, player),
+                                  queue=queue, stats=stats, weight=weight,
+                                  budget=budget, observer=observer):
+            return [board.decode(boxes, player) for boxes, player in path]
+
+
+def Astar_anytime(board, boxes, player, queue='fibonacci', stats=None,
+                  weight=3, max_nodes=None, max_seconds=None,
+                  max_memory=None, observer=None):
+    """
+    Anytime weighted A*: yields a first solution as soon as the weighted
+    search finds one, then keeps on searching and yields every cheaper
+    solution found, pruning states which can not beat the best one. If the
+    open set runs empty before the budget, the last solution is optimal.
+    The arguments are those of `Astar_search`.
+
+        for path in Astar_anytime(board, boxes, player, max_seconds=5):
+            best = path
+    """
+    weight = check_weight(queue, weight)
+    budget = Budget(max_nodes, max_seconds, max_memory)
+    stats = new_stats(stats)
+    with observe(observer, board, stats):
+        for path in _Astar_search(board, *board.encode(boxes, player),
+                                  queue=queue, stats=stats, weight=weight,
+                                  budget=budget, anytime=True,
+                                  observer=observer):
+            yield [board.decode(boxes, player) for boxes, player in path]
+
+
+def _Astar_search(board, boxes, player, queue='fibonacci', stats=None,
+                  weight=1, budget=None, anytime=False, observer=None):
+    """
+    Yields solutions as reversed lists of (boxes, player) states. Without
+    `anytime` the first solution ends the search, otherwise each one is
+    cheaper than the previous one.
+    """
+    stats = new_stats(stats)
+    budget = budget if budget is not None else Budget()
     moves, norm_pos, reachable = board.moves_available(boxes, player)
 
-    openset = FibonacciHeap()
-    openset.add(
-        frozenset(boxes), norm_pos, reachable, moves, 0,
-        heuristic(board.goals, boxes))
-
-    closedset = StateSet()
+    # Every state seen so far, open or closed, and the g-scores of the
+    # closed ones. In anytime mode a closed state is opened again when it
+    # is reached by a cheaper path, which the weighted search may do; a
+    # single weighted search stays quicker by never reopening, and its
+    # solution is still within `weight` times the optimal cost.
+    seen = StateSet(keyed=True, directions=board.directions)
+    openset = QUEUES.get(queue, queue)(state_set=seen)
+    start = perf_counter()
+    hscore, matching = assignment(board, boxes)
+    stats['heuristic_time'] += perf_counter() - start
+    openset.add(boxes, norm_pos, reachable, moves, 0, weight * hscore,
+                matching)
+
+    closedset = dict()
     camefrom = dict()
+    best = inf
 
     while not openset.is_empty:
+        stats['exhausted'] = budget.exhausted(stats['expanded'])
+        if stats['exhausted']:
+            return
+        stats['frontier'] = max(stats['frontier'], len(openset))
         state_info = openset.pop()
-        closedset.update(state_info['boxes'], state_info['norm_pos'],
-                         state_info['reachable'])
-
-        tentative_gscore = state_info['gscore'] + 1
+        gscore = state_info['gscore']
+        hscore = round((state_info['fscore'] - gscore) / weight)
+        closedset[(state_info['boxes'], state_info['norm_pos'])] = gscore
+        if gscore + hscore >= best:  # can not beat the best solution
+            continue
+        stats['expanded'] += 1
+        stats['generated'] += len(state_info['moves'])
+        if observer is not None:
+            observer.update(len(openset), len(closedset))
 
         for new_pos, d in state_info['moves']:
-            boxes = set(state_info['boxes'])
-            boxes.remove(new_pos)
-            boxes.add(new_pos + d)
-            boxes = frozenset(boxes)
-
-            if (boxes, new_pos) in closedset:
+            boxes = board.push(state_info['boxes'], new_pos, d)
+            player = board.player_after(new_pos, d)
+            norm_pos = seen.look_up((boxes, player))
+            tentative_gscore = gscore + board.push_count(d)
+
+            closed_gscore = closedset.get((boxes, norm_pos))
+            if closed_gscore is not None and (
+                    not anytime or tentative_gscore >= closed_gscore):
+                stats['duplicates'] += 1
                 continue
             elif board.is_finished(boxes):
-                return [(boxes, new_pos)] + reconstruct_path(
-                    camefrom, (state_info['boxes'], state_info['norm_pos']))
-
-            # if not boxes.difference(
-            #         set([Position(2, 6),
-            #              Position(2, 4),
-            #              Position(4, 3)])):
-            #     from IPython import embed
-            #     embed()
-
-            norm_pos = openset.look_up((boxes, new_pos))
-            if norm_pos is None:
+                if tentative_gscore < best:
+                    best = tentative_gscore
+                    yield [(boxes, player)] + reconstruct_path(
+                        camefrom,
+                        (state_info['boxes'], state_info['norm_pos']))
+                    if not anytime:
+                        return
+                continue
+
+            if norm_pos is None or closed_gscore is not None:
                 moves, norm_pos, reachable = board.moves_available(
-                    boxes, new_pos)
-                # print(moves, boxes, new_pos)
+                    boxes, player)
+                if not moves:  # a deadlock, never worth expanding
+                    seen.update(boxes, norm_pos, reachable)
+                    closedset[(boxes, norm_pos)] = 0
+                    continue
+                start = perf_counter()
+                new_hscore, matching = update_assignment(
+                    board, boxes, hscore, state_info['assignment'], new_pos,
+                    d)
+                stats['heuristic_time'] += perf_counter() - start
+                if tentative_gscore + new_hscore >= best:
+                    continue
+                closedset.pop((boxes, norm_pos), None)
                 openset.add(boxes, norm_pos, reachable, moves,
-                            tentative_gscore, heuristic(board.goals, boxes))
+                            tentative_gscore,
+                            tentative_gscore + weight * new_hscore, matching)
             elif tentative_gscore >= openset.get_gscore((boxes, norm_pos)):
+                stats['duplicates'] += 1
                 continue
 
             openset.decreaseKey((boxes, norm_pos), tentative_gscore)
@@ -1,27 +1,74 @@
+from collections import deque
+
 from .stateset import StateSet
+from .stats import new_stats, observe
+from .budget import Budget
+
+
+def reconstruct_moves(parents, current):
+    """Follows the parent pointers back from current to the start."""
+    moves = []
+    while current in parents:
+        current, move = parents[current]
+        moves.append(move)
+    return moves[::-1]
+
 
+def breadth_first_search(board, boxes, player, stats=None, observer=None,
+                         max_nodes=None, max_seconds=None, max_memory=None):
+    """
+    If `stats` is a dict, the counters of `new_stats` are kept there. An
+    `Observer` is given snapshots of them as the search goes. The search
+    gives up and returns None once one of the `Budget` limits is reached,
+    as in `Astar_search`.
+    """
+    budget = Budget(max_nodes, max_seconds, max_memory)
+    stats = new_stats(stats)
+    with observe(observer, board, stats):
+        path = _breadth_first_search(board, *board.encode(boxes, player),
+                                     stats=stats, budget=budget,
+                                     observer=observer)
+    if path is not None:
+        return [(board.position(pos), board.direction(d))
+                for move in path for pos, d in board.unit_pushes(*move)]
 
-def breadth_first_search(board, boxes, player):
 
-    stack = [(frozenset(boxes), player, [])]
-    state_info_cache = StateSet()
+def _breadth_first_search(board, boxes, player, stats=None, budget=None,
+                          observer=None):
+    stats = new_stats(stats)
+    budget = budget if budget is not None else Budget()
+    queue = deque([(boxes, player)])
+    parents = dict()
+    state_info_cache = StateSet(keyed=True, directions=board.directions)
 
-    while stack:
-        boxes, player, path = stack.pop(0)
+    while queue:
+        stats['exhausted'] = budget.exhausted(stats['expanded'])
+        if stats['exhausted']:
+            return
+        stats['frontier'] = max(stats['frontier'], len(queue))
+        boxes, player = queue.popleft()
+        if (boxes, player) in state_info_cache:
+            continue
 
         moves, norm_pos, reachable = board.moves_available(boxes, player)
         state_info_cache.update(boxes, norm_pos, reachable)
+        stats['expanded'] += 1
+        stats['generated'] += len(moves)
+        if observer is not None:
+            observer.update(len(queue), len(state_info_cache))
 
         for new_pos, d in moves:
-            new_boxes = set(boxes)
-            new_boxes.remove(new_pos)
-            new_boxes.add(new_pos + d)
-            new_boxes = frozenset(new_boxes)
+            new_boxes = board.push(boxes, new_pos, d)
+            new_player = board.player_after(new_pos, d)
 
-            if (new_boxes, new_pos) in state_info_cache:
+            if (new_boxes, new_player) in state_info_cache:
+                stats['duplicates'] += 1
                 continue
-            elif board.is_finished(new_boxes):
-                return path + [(new_pos, d)]
+            if (new_boxes, new_player) not in parents:
+                parents[(new_boxes, new_player)] = ((boxes, player),
+                                                    (new_pos, d))
+            if board.is_finished(new_boxes):
+                return reconstruct_moves(parents, (new_boxes, new_player))
             else:
-                # board.print_board(new_boxes, new_pos)
-                stack.append((new_boxes, new_pos, path + [(new_pos, d)]))
+                # board.print_board(*board.decode(new_boxes, new_player))
+                queue.append((new_boxes, new_player))
@@ -0,0 +1,98 @@
+from collections import deque
+
+from .stateset import StateSet
+from .Astar import reconstruct_path
+
+
+def bidirectional_search(board, boxes, player):
+    """
+    Breadth-first push search from the start, run alternately with a
+    breadth-first pull search from the goal configuration, until a state
+    is reached from both sides. Returns the same path as `Astar_search`,
+    from the last state back to the start.
+    """
+    path = _bidirectional_search(board, *board.encode(boxes, player))
+    if path is not None:
+        return [board.decode(boxes, player) for boxes, player in path]
+
+
+def _bidirectional_search(board, boxes, player):
+    moves, norm_pos, reachable = board.moves_available(boxes, player)
+    start = (boxes, norm_pos)
+    if board.is_finished(boxes):
+        return [start]
+
+    forward = StateSet(keyed=True, directions=board.directions)
+    forward.update(boxes, norm_pos, reachable)
+    forward_frontier = deque([(boxes, norm_pos, moves)])
+    camefrom = dict()
+
+    # The player may end in any area of the goal configuration.
+    backward = StateSet(keyed=True, directions=board.directions)
+    backward_frontier = deque()
+    goingto = dict()
+    free = board.floor & ~board.goal_mask
+    while free:
+        pulls, norm_pos, reachable = board.pulls_available(
+            board.goal_mask, (free & -free).bit_length() - 1)
+        free &= ~reachable
+        backward.update(board.goal_mask, norm_pos, reachable)
+        backward_frontier.append((board.goal_mask, norm_pos, pulls))
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            meet = _expand_forward(board, forward_frontier, forward,
+                                   backward, camefrom)
+        else:
+            meet = _expand_backward(board, backward_frontier, backward,
+                                    forward, goingto)
+        if meet is not None:
+            return _join(camefrom, goingto, *meet)
+
+
+def _expand_forward(board, frontier, forward, backward, camefrom):
+    """Expands one layer of the push search."""
+    for _ in range(len(frontier)):
+        boxes, norm_pos, moves = frontier.popleft()
+        for box, d in moves:
+            new_boxes = board.push(boxes, box, d)
+            player = board.player_after(box, d)
+            if (new_boxes, player) in forward:
+                continue
+
+            new_moves, new_norm, reachable = board.moves_available(
+                new_boxes, player)
+            forward.update(new_boxes, new_norm, reachable)
+            camefrom[(new_boxes, new_norm)] = (boxes, norm_pos)
+
+            other = backward.look_up((new_boxes, player))
+            if other is not None:
+                return (new_boxes, new_norm), (new_boxes, other)
+            frontier.append((new_boxes, new_norm, new_moves))
+
+
+def _expand_backward(board, frontier, backward, forward, goingto):
+    """Expands one layer of the pull search."""
+    for _ in range(len(frontier)):
+        boxes, norm_pos, pulls = frontier.popleft()
+        for box, d in pulls:
+            new_boxes = board.push(boxes, box, d)
+            player = box + 2 * d
+            if (new_boxes, player) in backward:
+                continue
+
+            new_pulls, new_norm, reachable = board.pulls_available(
+                new_boxes, player)
+            backward.update(new_boxes, new_norm, reachable)
+            goingto[(new_boxes, new_norm)] = (boxes, norm_pos)
+
+            other = forward.look_up((new_boxes, player))
+            if other is not None:
+                return (new_boxes, other), (new_boxes, new_norm)
+            frontier.append((new_boxes, new_norm, new_pulls))
+
+
+def _join(camefrom, goingto, forward_state, backward_state):
+    """Glues the two half paths at the state where the searches met."""
+    path = reconstruct_path(goingto, backward_state)[:0:-1]
+    return path + reconstruct_path(camefrom, forward_state)
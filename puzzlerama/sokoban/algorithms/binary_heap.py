@@ -0,0 +1,81 @@
+from heapq import heappush, heappop
+from itertools import count
+
+from .stateset import StateSet
+
+
+class BinaryHeap:
+    """
+    A `heapq` priority queue with lazy deletion. `decreaseKey` pushes a new
+    entry instead of moving the old one; the g-score table `cache` holds the
+    live value of every key, and stale entries are dropped when popped.
+    """
+
+    def __init__(self, state_set=None):
+        self.heap = []
+        self.cache = dict()
+        self.state_set = state_set if state_set is not None else StateSet(
+            keyed=True)
+        self.counter = count()
+
+    @property
+    def is_empty(self):
+        return not self.cache
+
+    def __len__(self):
+        return len(self.cache)
+
+    def peek(self):
+        """The value with the smallest f-score, left in the heap."""
+        while self.heap:
+            fscore, _, _, value = self.heap[0]
+            key = (value['boxes'], value['norm_pos'])
+            if fscore == value['fscore'] and self.cache.get(key) is value:
+                return value
+            heappop(self.heap)
+
+    def look_up(self, item):
+        return self.state_set.look_up(item)
+
+    def get_gscore(self, key):
+        return self.cache[key]['gscore']
+
+    def add(self,
+            boxes,
+            norm_pos,
+            reachable,
+            moves,
+            gscore,
+            fscore,
+            assignment=None):
+        value = {
+            'boxes': boxes,
+            'norm_pos': norm_pos,
+            'moves': moves,
+            'gscore': gscore,
+            'fscore': fscore,
+            'assignment': assignment
+        }
+
+        self.state_set.update(boxes, norm_pos, reachable)
+        self.cache[(boxes, norm_pos)] = value
+        heappush(self.heap, (fscore, -gscore, next(self.counter), value))
+
+    def pop(self):
+        while self.heap:
+            fscore, _, _, value = heappop(self.heap)
+            key = (value['boxes'], value['norm_pos'])
+            if fscore == value['fscore'] and self.cache.get(key) is value:
+                self.cache.pop(key)
+                return value
+
+    def decreaseKey(self, key, gscore):
+        value = self.cache[key]
+
+        if gscore >= value['gscore']:
+            return
+
+        value['fscore'] += (gscore - value['gscore'])
+        value['gscore'] = gscore
+        heappush(self.heap,
+                 (value['fscore'], -gscore, next(self.counter), value))
@@ -0,0 +1,94 @@
+from .stateset import StateSet
+
+
+class BucketQueue:
+    """
+    A priority queue for small non-negative integer f-scores: one list per
+    f-score and a pointer to the lowest non-empty one. Like `BinaryHeap`,
+    `decreaseKey` inserts a new entry and stale entries are dropped when
+    popped. Entries with the same f-score are popped last in, first out,
+    which favours the deepest nodes.
+    """
+
+    def __init__(self, state_set=None):
+        self.buckets = []
+        self.cache = dict()
+        self.state_set = state_set if state_set is not None else StateSet(
+            keyed=True)
+        self.min_fscore = 0
+
+    @property
+    def is_empty(self):
+        return not self.cache
+
+    def __len__(self):
+        return len(self.cache)
+
+    def peek(self):
+        """The value with the smallest f-score, left in the queue."""
+        while self.min_fscore < len(self.buckets):
+            bucket = self.buckets[self.min_fscore]
+            while bucket:
+                value = bucket[-1]
+                key = (value['boxes'], value['norm_pos'])
+                if (value['fscore'] == self.min_fscore
+                        and self.cache.get(key) is value):
+                    return value
+                bucket.pop()
+            self.min_fscore += 1
+
+    def look_up(self, item):
+        return self.state_set.look_up(item)
+
+    def get_gscore(self, key):
+        return self.cache[key]['gscore']
+
+    def _insert(self, value):
+        fscore = value['fscore']
+        while len(self.buckets) <= fscore:
+            self.buckets.append([])
+        self.buckets[fscore].append(value)
+        self.min_fscore = min(self.min_fscore, fscore)
+
+    def add(self,
+            boxes,
+            norm_pos,
+            reachable,
+            moves,
+            gscore,
+            fscore,
+            assignment=None):
+        value = {
+            'boxes': boxes,
+            'norm_pos': norm_pos,
+            'moves': moves,
+            'gscore': gscore,
+            'fscore': fscore,
+            'assignment': assignment
+        }
+
+        self.state_set.update(boxes, norm_pos, reachable)
+        self.cache[(boxes, norm_pos)] = value
+        self._insert(value)
+
+    def pop(self):
+        while self.min_fscore < len(self.buckets):
+            bucket = self.buckets[self.min_fscore]
+            while bucket:
+                value = bucket.pop()
+                key = (value['boxes'], value['norm_pos'])
+                if (value['fscore'] == self.min_fscore
+                        and self.cache.get(key) is value):
+                    self.cache.pop(key)
+                    return value
+            self.min_fscore += 1
+
+    def decreaseKey(self, key, gscore):
+        value = self.cache[key]
+
+        if gscore >= value['gscore']:
+            return
+
+        value['fscore'] += (gscore - value['gscore'])
+        value['gscore'] = gscore
+        self._insert(value)
@@ -0,0 +1,54 @@
+import sys
+import resource
+from time import perf_counter
+
+
+def peak_memory():
+    """Peak resident memory of this process in megabytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / (1 << 10)
+
+
+def current_memory():
+    """
+    Resident memory of this process in megabytes, read from /proc where
+    there is one, or else its peak.
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return peak_memory()
+    return pages * resource.getpagesize() / (1 << 20)
+
+
+class Budget:
+    """
+    Limits on a search: states expanded, seconds since the budget was made
+    and megabytes the resident memory grew by since then, so that a
+    process which runs several searches gives each of them the whole limit.
+    Without /proc (macOS) this is the growth of the peak memory instead,
+    which only counts once the process goes past its old peak. A limit
+    of `None` is no limit. Memory is only looked at every `memory_interval`
+    expansions.
+    """
+
+    memory_interval = 1024
+
+    def __init__(self, nodes=None, seconds=None, memory=None):
+        self.nodes = nodes
+        self.deadline = None if seconds is None else perf_counter() + seconds
+        self.memory = (None if memory is None else current_memory() +
+                       memory)
+
+    def exhausted(self, expanded):
+        """The name of the first limit reached, or None."""
+        if self.nodes is not None and expanded >= self.nodes:
+            return 'nodes'
+        if self.deadline is not None and perf_counter() >= self.deadline:
+            return 'seconds'
+        if (self.memory is not None
+                and expanded % self.memory_interval == 0
+                and current_memory() >= self.memory):
+            return 'memory'
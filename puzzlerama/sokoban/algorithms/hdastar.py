@@ -0,0 +1,199 @@
+import os
+from math import inf
+from queue import Empty
+from multiprocessing import Process, Queue
+
+from .stateset import StateSet
+from .Astar import QUEUES, assignment, update_assignment, reconstruct_path
+
+
+def owner(boxes, num_workers):
+    """
+    The worker in charge of the states of a box configuration. Every player
+    area of the boxes goes to the same worker, so a child can be sent
+    before its area is known.
+    """
+    return hash(boxes) % num_workers
+
+
+def HDAstar_search(board, boxes, player, workers=None, queue='bucket'):
+    """
+    Hash-distributed A*. Every state belongs to the worker picked by hashing
+    its boxes; each worker keeps its own open set (a `queue` backend of
+    `Astar_search`) and closed set and sends the children it generates to
+    their owners as bare (boxes, player) pairs. The owner finds the player
+    area, drops duplicates and only then generates the moves of the new
+    states. Returns a path as short as that of `Astar_search`.
+    """
+    path = _HDAstar_search(board, *board.encode(boxes, player),
+                           workers or os.cpu_count(), queue)
+    if path is not None:
+        return [board.decode(boxes, player) for boxes, player in path]
+
+
+def _HDAstar_search(board, boxes, player, num_workers, queue='bucket'):
+    if board.is_finished(boxes):
+        return [(boxes, player)]
+    hscore, matching = assignment(board, boxes)
+
+    inboxes = [Queue() for _ in range(num_workers)]
+    results = Queue()
+    processes = [
+        Process(target=_worker,
+                args=(board, idx, inboxes, results, queue), daemon=True)
+        for idx in range(num_workers)
+    ]
+    for p in processes:
+        p.start()
+
+    inboxes[owner(boxes, num_workers)].put(
+        ('state', boxes, player, 0, hscore, matching, None))
+    sent = 1
+
+    best = None
+    snapshot, probe = None, 0
+    while True:
+        # Collect solutions until the workers are quiet, then probe them.
+        try:
+            msg = results.get(timeout=0.05)
+        except Empty:
+            msg = None
+        if msg is not None:
+            if msg[0] == 'solution' and (best is None or msg[1] < best[0]):
+                best = msg[1:]
+                for inbox in inboxes:
+                    inbox.put(('bound', best[0]))
+            continue
+
+        # Four-counter termination: stop once two successive probes find
+        # every worker idle with the same, balanced message counters.
+        probe += 1
+        for inbox in inboxes:
+            inbox.put(('probe', probe))
+        status = []
+        while len(status) < num_workers:
+            msg = results.get()
+            if msg[0] == 'status' and msg[1] == probe:
+                status.append(msg[2:])
+            elif msg[0] == 'solution' and (best is None or msg[1] < best[0]):
+                best = msg[1:]
+                for inbox in inboxes:
+                    inbox.put(('bound', best[0]))
+        counters = (sent + sum(s for s, _, _ in status),
+                    sum(r for _, r, _ in status))
+        idle = all(i for _, _, i in status)
+        if idle and counters[0] == counters[1] and counters == snapshot:
+            break
+        snapshot = counters if idle else None
+
+    for inbox in inboxes:
+        inbox.put(('stop', ))
+    camefrom = dict()
+    for _ in range(num_workers):
+        msg = results.get()
+        while msg[0] != 'camefrom':
+            msg = results.get()
+        camefrom.update(msg[1])
+    for p in processes:
+        p.join()
+
+    if best is not None:
+        _, final, parent = best
+        return [final] + reconstruct_path(camefrom, parent)
+
+
+def _worker(board, idx, inboxes, results, queue):
+    num_workers = len(inboxes)
+    inbox = inboxes[idx]
+    # The open set does not look states up, so its state set need not
+    # index the player areas.
+    openset = QUEUES.get(queue, queue)(state_set=StateSet())
+    closedset = dict()
+    camefrom = dict()
+    bound = inf
+    sent = received = 0
+
+    def receive(boxes, player, gscore, hscore, matching, parent):
+        reachable = board.reachable(boxes, player)
+        norm_pos = (reachable & -reachable).bit_length() - 1
+        key = (boxes, norm_pos)
+        if key in closedset:
+            # States may be reached again at a lower cost, as the workers do
+            # not expand in a global f-score order; they are then reopened.
+            if gscore >= closedset[key]:
+                return
+            del closedset[key]
+        if key in openset.cache:
+            if gscore >= openset.get_gscore(key):
+                return
+            openset.decreaseKey(key, gscore)
+        else:
+            moves = board.moves_available(boxes, player)[0]
+            if not moves:  # a deadlock, never worth expanding
+                closedset[key] = 0
+                return
+            openset.add(boxes, norm_pos, reachable, moves, gscore,
+                        gscore + hscore, matching)
+        if parent is not None:
+            camefrom[key] = parent
+
+    def expandable():
+        value = openset.peek()
+        return value is not None and value['fscore'] < bound
+
+    while True:
+        busy = expandable()
+        try:
+            msg = inbox.get(block=not busy, timeout=None if busy else 0.1)
+        except Empty:
+            msg = None
+
+        while msg is not None:
+            if msg[0] == 'state':
+                received += 1
+                receive(*msg[1:])
+            elif msg[0] == 'bound':
+                bound = min(bound, msg[1])
+            elif msg[0] == 'probe':
+                results.put(('status', msg[1], sent, received,
+                             not expandable()))
+            elif msg[0] == 'stop':
+                results.put(('camefrom', camefrom))
+                return
+            try:
+                msg = inbox.get_nowait()
+            except Empty:
+                msg = None
+
+        if not expandable():
+            continue
+
+        state_info = openset.pop()
+        key = (state_info['boxes'], state_info['norm_pos'])
+        closedset[key] = state_info['gscore']
+
+        hscore = state_info['fscore'] - state_info['gscore']
+        for new_pos, d in state_info['moves']:
+            boxes = board.push(state_info['boxes'], new_pos, d)
+            player = board.player_after(new_pos, d)
+            tentative_gscore = state_info['gscore'] + board.push_count(d)
+            if board.is_finished(boxes):
+                if tentative_gscore < bound:
+                    bound = tentative_gscore
+                    results.put(('solution', tentative_gscore,
+                                 (boxes, player), key))
+                continue
+
+            new_hscore, matching = update_assignment(
+                board, boxes, hscore, state_info['assignment'], new_pos, d)
+            if tentative_gscore + new_hscore >= bound:
+                continue
+
+            msg = (boxes, player, tentative_gscore, new_hscore, matching,
+                   key)
+            target = owner(boxes, num_workers)
+            if target == idx:
+                receive(*msg)
+            else:
+                sent += 1
+                inboxes[target].put(('state', ) + msg)
@@ -0,0 +1,110 @@
+from math import inf
+
+from .Astar import assignment, update_assignment
+
+
+class TranspositionTable:
+    """
+    A fixed-size table of the states searched in the current iteration and
+    the smallest g-score they were searched with. On a collision the entry
+    closest to the root is kept, since it prunes the largest subtree.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.slots = [None] * size
+        self.iteration = 0
+
+    def visit(self, key, gscore):
+        """Records key at gscore, or returns False if it is already done."""
+        idx = hash(key) % self.size
+        entry = self.slots[idx]
+        if entry is not None and entry[2] == self.iteration:
+            if entry[0] == key and entry[1] <= gscore:
+                return False
+            if entry[0] != key and entry[1] < gscore:
+                return True
+        self.slots[idx] = (key, gscore, self.iteration)
+        return True
+
+
+def IDAstar_search(board, boxes, player, table_size=1 << 20):
+    """
+    Iterative deepening A* with the heuristic of `Astar_search`. Memory is
+    bounded by the transposition table of `table_size` entries and the
+    depth of the solution. Returns the same path as `Astar_search`.
+    """
+    path = _IDAstar_search(board, *board.encode(boxes, player), table_size)
+    if path is not None:
+        return [board.decode(boxes, player) for boxes, player in path]
+
+
+def _IDAstar_search(board, boxes, player, table_size=1 << 20):
+    table = TranspositionTable(table_size)
+    hscore, matching = assignment(board, boxes)
+
+    bound = hscore
+    while bound < inf:
+        table.iteration += 1
+        path, bound = _search(board, table, boxes, player, hscore, matching,
+                              bound)
+        if path is not None:
+            return path
+
+
+def _children(board, boxes, player, hscore, matching):
+    """The children of a state, the most promising last."""
+    children = []
+    for box, d in board.moves_available(boxes, player)[0]:
+        new_boxes = board.push(boxes, box, d)
+        new_hscore, new_matching = update_assignment(
+            board, new_boxes, hscore, matching, box, d)
+        children.append((new_hscore, new_boxes, box, d, new_matching))
+    children.sort(key=lambda child: child[0])
+    children.reverse()
+    return children
+
+
+def _search(board, table, boxes, player, hscore, matching, bound):
+    """
+    Depth-first search of the states within bound, on an explicit stack so
+    that the length of a solution is not limited by the recursion limit.
+    Returns the path to a solution within bound, if any, and the smallest
+    f-score beyond bound met.
+    """
+    # One frame per state of the current path: its key, its g-score, its
+    # children left to search and the smallest f-score beyond bound met
+    # below it.
+    stack = []
+    state = (boxes, player, 0, hscore, matching)
+    while True:
+        if state is not None:
+            boxes, player, gscore, hscore, matching = state
+            state = None
+            fscore = gscore + hscore
+            if fscore > bound:
+                stack[-1][3] = min(stack[-1][3], fscore)
+                continue
+
+            # The transposition table is looked at before generating the
+            # pushes, so states already searched cost a flood fill only.
+            reach = board.reachable(boxes, player)
+            key = (boxes, (reach & -reach).bit_length() - 1)
+            if board.is_finished(boxes):
+                return [key] + [frame[0] for frame in stack[::-1]], fscore
+            if table.visit(key, gscore):
+                stack.append([key, gscore,
+                              _children(board, boxes, player, hscore,
+                                        matching), inf])
+            continue
+
+        key, gscore, children, next_bound = stack[-1]
+        if children:
+            new_hscore, new_boxes, box, d, new_matching = children.pop()
+            state = (new_boxes, board.player_after(box, d),
+                     gscore + board.push_count(d), new_hscore, new_matching)
+            continue
+        stack.pop()
+        if not stack:
+            return None, next_bound
+        stack[-1][3] = min(stack[-1][3], next_bound)
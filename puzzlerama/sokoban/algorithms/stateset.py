@@ -1,27 +1,68 @@
 from collections import defaultdict
 
+from board import bits, shift
+
 
 class StateSet:
-    def __init__(self):
+    """
+    Stores, for each box configuration, the player access areas seen so far
+    keyed by their normalized (top-left) square.
+
+    In keyed mode every square of a stored area also points directly to its
+    normalized square, so that finding the state of a (boxes, player) pair
+    is a couple of dictionary lookups instead of a scan over all stored
+    areas of the box configuration. The areas themselves are not kept.
+
+    Given the board `directions`, a keyed set only indexes the squares next
+    to a box. It can then only look up players standing next to a box,
+    which is always the case right after a push or a pull.
+    """
+
+    def __init__(self, keyed=False, directions=None):
+        self.keyed = keyed
+        self.directions = directions
         self.cache = defaultdict(dict)
+        self.regions = defaultdict(dict)
+        self.size = 0
+
+    def __len__(self):
+        """The number of (boxes, player area) states stored."""
+        return self.size
 
     def __contains__(self, item):
-        boxes, player = item
-        if boxes in self.cache:
-            state_info = self.cache[boxes]
-            for norm_pos in state_info:
-                if player in state_info[norm_pos]:
-                    return True
-        return False
+        return self.look_up(item) is not None
 
     def update(self, boxes, norm_pos, reachable):
-        self.cache[boxes][norm_pos] = reachable
+        if not self.keyed:
+            if norm_pos not in self.cache[boxes]:
+                self.size += 1
+            self.cache[boxes][norm_pos] = reachable
+            return
+        if not reachable:  # no area given, nothing to index
+            return
+
+        if self.directions is not None:
+            around = 0
+            for d in self.directions:
+                around |= shift(boxes, d)
+            reachable &= around
+        region = self.regions[boxes]
+        # Areas are disjoint, so the state is new if any square is.
+        first = (reachable & -reachable).bit_length() - 1
+        if first >= 0 and first not in region:
+            self.size += 1
+        for pos in bits(reachable):
+            region[pos] = norm_pos
 
     def look_up(self, item):
         boxes, player = item
-        if boxes in self.cache:
+        if self.keyed:
+            region = self.regions.get(boxes)
+            if region is not None:
+                return region.get(player)
+        elif boxes in self.cache:
             state_info = self.cache[boxes]
             for norm_pos in state_info:
-                if player in state_info[norm_pos]:
+                if state_info[norm_pos] >> player & 1:
                     return norm_pos
         return None
@@ -0,0 +1,92 @@
+import json
+from time import perf_counter
+from contextlib import nullcontext
+
+
+def new_stats(stats):
+    """
+    Resets the search counters kept in the dict `stats`: states expanded,
+    children generated, the peak size of the frontier, children already
+    seen, time spent in the heuristic and the budget limit that stopped the
+    search, if any.
+    """
+    if stats is None:
+        stats = dict()
+    stats.update(expanded=0, generated=0, frontier=0, duplicates=0,
+                 heuristic_time=0.0, exhausted=None)
+    return stats
+
+
+def observe(observer, board, stats):
+    """
+    Context around a search: starts `observer`, if any, and finishes it
+    however the search ends.
+    """
+    if observer is None:
+        return nullcontext()
+    observer.start(board, stats)
+    return observer
+
+
+class Observer:
+    """
+    Takes a snapshot of the counters of a search every `interval`
+    expansions and once more when the search ends. Snapshots are plain
+    dicts of numbers, kept in `snapshots`; override `notify` to send them
+    elsewhere as they come.
+
+    The searches call `start`, then `update` after every expansion, then
+    `finish`; between snapshots `update` only stores the open and closed
+    sizes and compares two integers.
+    """
+
+    def __init__(self, interval=1000):
+        self.interval = interval
+        self.snapshots = []
+
+    def start(self, board, stats):
+        self.board = board
+        self.stats = stats
+        self.open_size = self.closed_size = 0
+        self.start_time = perf_counter()
+        self.start_deadlocks = board.deadlocks
+        self.next_expanded = self.interval
+
+    def update(self, open_size, closed_size):
+        self.open_size, self.closed_size = open_size, closed_size
+        if self.stats['expanded'] >= self.next_expanded:
+            self.next_expanded += self.interval
+            self.notify(self.snapshot())
+
+    def finish(self):
+        self.notify(self.snapshot())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.finish()
+
+    def snapshot(self):
+        stats = self.stats
+        elapsed = perf_counter() - self.start_time
+        return {
+            'time': round(elapsed, 4),
+            'expanded': stats['expanded'],
+            'generated': stats['generated'],
+            'expansions_per_second': round(stats['expanded'] / elapsed, 1)
+            if elapsed else 0.0,
+            'open': self.open_size,
+            'closed': self.closed_size,
+            'heuristic_share': round(stats['heuristic_time'] / elapsed, 4)
+            if elapsed else 0.0,
+            'duplicate_rate': round(stats['duplicates'] / stats['generated'],
+                                    4) if stats['generated'] else 0.0,
+            'deadlocks': self.board.deadlocks - self.start_deadlocks,
+        }
+
+    def notify(self, snapshot):
+        self.snapshots.append(snapshot)
+
+    def to_json(self):
+        return json.dumps(self.snapshots)
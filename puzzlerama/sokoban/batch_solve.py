@@ -0,0 +1,103 @@
+"""
+Solves every level of a map directory or level collection in parallel and
+prints one JSON line per level as soon as it is done.
+
+    python batch_solve.py maps/ --algorithm Astar --time-limit 60
+    python batch_solve.py levels.xsb --node-limit 1000000 --workers 16
+
+Directories are searched for .txt maps (the format of `load_map`) and
+.xsb/.sok collections.
+"""
+import os
+import sys
+import json
+import argparse
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from load_map import load_map, parse_level, read_levels
+from lurd import lurd
+from solutions import pushes
+from algorithms.Astar import Astar_search
+from algorithms.bfs import breadth_first_search
+from algorithms.dfs import depth_first_search
+
+ALGORITHMS = {
+    'bfs': breadth_first_search,
+    'dfs': depth_first_search,
+    'Astar': Astar_search,
+}
+COLLECTIONS = ('.xsb', '.sok')
+
+
+# The status of a level whose search ran out of a `Budget` limit.
+LIMITS = {'nodes': 'node_limit', 'seconds': 'time_limit'}
+
+
+def iter_levels(paths):
+    """Yields (name, source) pairs, source being a file name or rows."""
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(
+                os.path.join(path, f) for f in os.listdir(path)
+                if f.endswith(('.txt', ) + COLLECTIONS))
+        else:
+            files = [path]
+
+        for file_name in files:
+            if file_name.endswith(COLLECTIONS):
+                for title, rows in read_levels(file_name):
+                    yield f'{file_name}:{title}', rows
+            else:
+                yield file_name, file_name
+
+
+def solve(name, source, algorithm, time_limit, node_limit):
+    if isinstance(source, str):
+        board, boxes, player = load_map(source)
+    else:
+        board, boxes, player = parse_level(source)
+
+    stats = dict()
+    start = perf_counter()
+    result = {'level': name, 'algorithm': algorithm}
+    path = ALGORITHMS[algorithm](board, boxes, player, stats=stats,
+                                 max_nodes=node_limit or None,
+                                 max_seconds=time_limit or None)
+    if path is not None:
+        result['status'] = 'solved'
+        result['solution'] = pushes(board, path, algorithm)
+        result['pushes'] = len(result['solution'])
+        result['lurd'] = lurd(board, boxes, player, result['solution'])
+    elif stats['exhausted']:
+        result['status'] = LIMITS[stats['exhausted']]
+    else:
+        result['status'] = 'unsolvable'
+    result['nodes'] = stats['expanded']
+    result['time'] = round(perf_counter() - start, 3)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--algorithm', choices=ALGORITHMS, default='Astar')
+    parser.add_argument('--time-limit', type=float, default=60,
+                        help='seconds per level, 0 for none')
+    parser.add_argument('--node-limit', type=int, default=0,
+                        help='expanded states per level, 0 for none')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+
+    with ProcessPoolExecutor(args.workers) as executor:
+        futures = [
+            executor.submit(solve, name, source, args.algorithm,
+                            args.time_limit, args.node_limit)
+            for name, source in iter_levels(args.paths)
+        ]
+        for future in as_completed(futures):
+            print(json.dumps(future.result()), flush=True)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
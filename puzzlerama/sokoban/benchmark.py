@@ -0,0 +1,126 @@
+"""
+Benchmarks bfs, dfs and A* on every map of maps/ and compares the results
+with a stored baseline.
+
+Each trial runs in a fresh process so that its peak RSS is its own. For
+every map and algorithm we record the median wall time over the trials,
+the states expanded, the children generated, the peak frontier size, the
+peak RSS and the number of pushes of the solution.
+
+    python benchmark.py                  # compare with benchmark.json
+    python benchmark.py --save           # store the results as baseline
+    python benchmark.py --trials 5 --algorithm Astar maps/hard.txt
+"""
+import os
+import sys
+import json
+import argparse
+import resource
+from glob import glob
+from statistics import median
+from time import perf_counter
+from multiprocessing import Pool
+
+from load_map import load_map
+from solutions import pushes
+from algorithms.Astar import Astar_search
+from algorithms.bfs import breadth_first_search
+from algorithms.dfs import depth_first_search
+
+ALGORITHMS = {
+    'bfs': breadth_first_search,
+    'dfs': depth_first_search,
+    'Astar': Astar_search,
+}
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'benchmark.json')
+METRICS = ['time', 'expanded', 'generated', 'frontier', 'rss', 'pushes']
+
+
+def trial(file_name, algorithm):
+    board, boxes, player = load_map(file_name)
+    stats = dict()
+
+    start = perf_counter()
+    path = ALGORITHMS[algorithm](board, boxes, player, stats=stats)
+    stats['time'] = perf_counter() - start
+
+    # ru_maxrss is in KiB on Linux.
+    stats['rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if path is None:
+        stats['pushes'] = None
+    else:
+        stats['pushes'] = len(pushes(board, path, algorithm))
+    return stats
+
+
+def run(file_name, algorithm, trials):
+    results = []
+    for _ in range(trials):
+        with Pool(1) as pool:
+            results.append(pool.apply(trial, (file_name, algorithm)))
+    res = {metric: results[0][metric] for metric in METRICS}
+    res['time'] = round(median(r['time'] for r in results), 4)
+    res['rss'] = max(r['rss'] for r in results)
+    return res
+
+
+def compare(res, base):
+    """Ratio of every metric to the baseline, as a printable string."""
+    cols = []
+    for metric in METRICS:
+        value = res[metric]
+        if metric == 'time':
+            text = f'{value:.3f}s'
+        else:
+            text = str(value)
+        old = base.get(metric) if base else None
+        if old and value is not None:
+            text += f' ({value / old:.2f}x)'
+        elif base and value != old:
+            text += f' (was {old})'
+        cols.append(f'{metric} {text}')
+    return ', '.join(cols)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('maps', nargs='*')
+    parser.add_argument('--algorithm', action='append', choices=ALGORITHMS,
+                        dest='algorithms',
+                        help='may be repeated, all algorithms by default')
+    parser.add_argument('--trials', type=int, default=3)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save', action='store_true',
+                        help='store the results as the new baseline')
+    args = parser.parse_args(argv)
+    args.algorithms = args.algorithms or list(ALGORITHMS)
+
+    file_names = args.maps or sorted(
+        glob(os.path.join(os.path.dirname(BASELINE), 'maps', '*.txt')))
+    baseline = dict()
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+
+    results = dict()
+    for file_name in file_names:
+        name = os.path.splitext(os.path.basename(file_name))[0]
+        results[name] = dict()
+        for algorithm in args.algorithms:
+            res = run(file_name, algorithm, args.trials)
+            results[name][algorithm] = res
+            base = baseline.get(name, {}).get(algorithm)
+            print(f'{name:<10} {algorithm:<5} {compare(res, base)}',
+                  flush=True)
+
+    if args.save:
+        for name, res in results.items():
+            baseline.setdefault(name, {}).update(res)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
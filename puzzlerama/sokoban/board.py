@@ -1,3 +1,9 @@
+from collections import defaultdict, deque
+from functools import cached_property
+
+import numpy as np
+
+
 class Position:
     def __init__(self, cord_x, cord_y):
         self.x = cord_x
@@ -28,69 +34,408 @@ class Position:
 DIRECTION = [Position(0, -1), Position(0, 1), Position(1, 0), Position(-1, 0)]
 
 
+def bits(mask):
+    """Yield the indices of the set bits of mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def shift(mask, delta):
+    """Move every square of mask by the flat offset delta."""
+    return mask << delta if delta > 0 else mask >> -delta
+
+
 class Board:
-    def __init__(self, num_lines, walls, goals):
-        self.num_lines = num_lines
+    """
+    Squares are flat integer indices and sets of squares are Python-int
+    bitmasks. There is one sentinel wall row above and below the map and one
+    sentinel wall column on the right, so that a step in any direction from
+    a square of the map never wraps around or goes negative.
+
+    The search algorithms work on the (boxes mask, player index) encoding;
+    `encode` and `decode` translate from and to `Position` sets at the
+    boundary.
+    """
+
+    def __init__(self,
+                 num_lines,
+                 walls,
+                 goals,
+                 freeze=True,
+                 corral=False,
+                 macros=False):
         self.walls = walls
         self.goals = goals
+        self.width = max(pos.x for pos in walls) + 2
+        self._build(num_lines, self.encode_set(walls), self.encode_set(goals),
+                    freeze, corral, macros)
+
+    @classmethod
+    def from_masks(cls,
+                   num_lines,
+                   width,
+                   wall_mask,
+                   goal_mask,
+                   freeze=True,
+                   corral=False,
+                   macros=False):
+        """
+        Builds a board straight from the flat-index masks of its walls and
+        goals, `width` being the index width including the sentinel column.
+        """
+        board = cls.__new__(cls)
+        board.width = width
+        board._build(num_lines, wall_mask, goal_mask, freeze, corral, macros)
+        return board
+
+    @cached_property
+    def walls(self):
+        """The walls of the map as `Position`s, without the sentinels."""
+        inside = self.encode_set(
+            Position(x, y) for y in range(self.num_lines)
+            for x in range(self.width - 1))
+        return set(self.decode_set(self.wall_mask & inside))
+
+    @cached_property
+    def goals(self):
+        return set(self.decode_set(self.goal_mask))
+
+    def _build(self, num_lines, wall_mask, goal_mask, freeze, corral,
+               macros):
+        self.num_lines = num_lines
+        self.freeze = freeze
+        self.corral = corral
+        self.macros = macros
+
+        self.size = (num_lines + 2) * self.width
+        self.directions = [
+            self.width * d.y + d.x for d in DIRECTION
+        ]
+
+        self.wall_mask = wall_mask
+        for y in (-1, num_lines):
+            for x in range(self.width):
+                self.wall_mask |= 1 << self.index(Position(x, y))
+        for y in range(num_lines):
+            self.wall_mask |= 1 << self.index(Position(self.width - 1, y))
+        self.goal_mask = goal_mask
 
         self.pull_reachable = self._detect_simple_deadlock()
+        self.goal_list = list(bits(self.goal_mask))
+        self.push_dist = self._push_distances()
+
+        self.floor = 0
+        for goal in self.goal_list:
+            self.floor |= self.reachable(0, goal)
+        self.axes = [self.directions[:2], self.directions[2:]]
+
+        self.patterns = defaultdict(list)
+        # Pushes left out, or states given no pushes, for a freeze, pattern
+        # or corral deadlock.
+        self.deadlocks = 0
+
+        # A push of k squares is the offset k * d of its unit direction d.
+        self.unit = dict()
+        for d, limit in zip(self.directions, [num_lines + 2] * 2 +
+                            [self.width] * 2):
+            for k in range(1, limit):
+                self.unit[k * d] = d
+        self.tunnels = self._detect_tunnels()
+
+    def index(self, pos):
+        return (pos.y + 1) * self.width + pos.x
+
+    def position(self, idx):
+        y, x = divmod(idx, self.width)
+        return Position(x, y - 1)
+
+    def encode_set(self, positions):
+        mask = 0
+        for pos in positions:
+            mask |= 1 << self.index(pos)
+        return mask
+
+    def decode_set(self, mask):
+        return frozenset(self.position(idx) for idx in bits(mask))
+
+    def encode(self, boxes, player):
+        return self.encode_set(boxes), self.index(player)
+
+    def decode(self, boxes, player):
+        return self.decode_set(boxes), self.position(player)
+
+    def direction(self, delta):
+        return DIRECTION[self.directions.index(delta)]
+
+    def reachable(self, boxes, player):
+        """Flood fill the player access area, one ring per iteration."""
+        free = ~(self.wall_mask | boxes)
+        reach = 1 << player
+        while True:
+            grown = reach
+            for d in self.directions:
+                grown |= shift(reach, d)
+            grown &= free
+            if grown == reach:
+                return reach
+            reach = grown
 
     def moves_available(self, boxes, player):
+        """
+        Returns the pushes (box index, direction offset) available from the
+        player access area, the normalized (top-left) player index and the
+        access area itself as a bitmask.
+
+        Pushes into a simple, freeze or known pattern deadlock are left out.
+        With `corral` enabled, a state whose closed areas can not be solved
+        has no pushes at all. With `macros` enabled, a push into a tunnel
+        goes on through the tunnel as a single move, whose offset is then a
+        multiple of its direction; see `player_after` and `push_count`.
+        """
+        reach = self.reachable(boxes, player)
+        norm_pos = (reach & -reach).bit_length() - 1
+
+        if self.corral and self.corral_deadlock(boxes, player, reach):
+            self.deadlocks += 1
+            return [], norm_pos, reach
+        pushes = self._all_pushes(boxes, reach)
+        moves_available = self._live_pushes(boxes, pushes)
+        if self.macros:
+            moves_available = self._macro_moves(boxes, moves_available)
+        # Counted here only, the sub-searches of corrals and patterns call
+        # `_pushes` directly.
+        self.deadlocks += len(pushes) - len(moves_available)
+        return moves_available, norm_pos, reach
+
+    def _pushes(self, boxes, reach):
+        return self._live_pushes(boxes, self._all_pushes(boxes, reach))
+
+    def _all_pushes(self, boxes, reach):
+        """The pushes from the access area reach onto live free squares."""
         moves_available = []
-        stack = [player]
-        norm_pos = player
-        mem = set()
+        target = self.pull_reachable & ~(self.wall_mask | boxes)
+        for d in self.directions:
+            pushable = shift(reach, d) & boxes & shift(target, -d)
+            for box in bits(pushable):
+                moves_available.append((box, d))
+        return moves_available
 
-        while stack:
-            player = stack.pop(0)
-            if player in mem:
-                continue
-            mem.add(player)
-            if player.y < norm_pos.y:
-                norm_pos = player
-            elif player.y == norm_pos.y and player.x < norm_pos.x:
-                norm_pos = player
-
-            for d in DIRECTION:
-                new_pos = player + d
-                if new_pos in mem or new_pos in self.walls:
-                    continue
-                elif new_pos in boxes:
-                    new_box_pos = new_pos + d
-                    if new_box_pos not in self.walls.union(
-                            boxes) and new_box_pos in self.pull_reachable:
-                        moves_available.append((new_pos, d))
-                else:
-                    stack.append(new_pos)
+    def _live_pushes(self, boxes, pushes):
+        """The pushes which do not end in a freeze or pattern deadlock."""
+        return [(box, d) for box, d in pushes
+                if not self._deadlocked(self.push(boxes, box, d), box + d)]
+
+    def _deadlocked(self, boxes, box):
+        return (self.freeze and self.freeze_deadlock(boxes, box)
+                or self.pattern_deadlock(boxes, box))
+
+    def pulls_available(self, boxes, player):
+        """
+        The reverse of `moves_available`: returns the pulls (box index,
+        direction offset) available from the player access area, moving the
+        box to `box + d` and the player to `box + 2 * d`, the normalized
+        player index and the access area.
+        """
+        reach = self.reachable(boxes, player)
+        norm_pos = (reach & -reach).bit_length() - 1
+
+        pulls_available = []
+        free = ~(self.wall_mask | boxes)
+        for d in self.directions:
+            pullable = shift(reach & shift(free, -d), -d) & boxes
+            for box in bits(pullable):
+                pulls_available.append((box, d))
+
+        return pulls_available, norm_pos, reach
+
+    def push(self, boxes, box, d):
+        return boxes ^ (1 << box) ^ (1 << (box + d))
 
-        return moves_available, norm_pos, mem
+    def player_after(self, box, d):
+        """Square of the player after the move (box, d)."""
+        return box + d - self.unit[d]
+
+    def push_count(self, d):
+        """Number of single pushes in a move of offset d."""
+        return d // self.unit[d]
+
+    def unit_pushes(self, box, d):
+        """Splits the move (box, d) into single pushes."""
+        unit = self.unit[d]
+        return [(box + k * unit, unit) for k in range(d // unit)]
+
+    def _detect_tunnels(self):
+        """
+        For each direction d, the squares s off goals such that both s and
+        s - d have walls on both sides across d. Once a box is pushed along
+        d onto s, the player is stuck behind it in a one-wide corridor, so
+        the box is pushed on until it leaves the tunnel.
+        """
+        tunnels = dict()
+        for axis, across in [(self.axes[0], self.axes[1]),
+                             (self.axes[1], self.axes[0])]:
+            walled = self.floor
+            for a in across:
+                walled &= shift(self.wall_mask, -a)
+            for d in axis:
+                tunnels[d] = walled & shift(walled, d) & ~self.goal_mask
+        return tunnels
+
+    def _macro_moves(self, boxes, moves):
+        macro_moves = []
+        for box, d in moves:
+            end = box + d
+            tunnel = self.tunnels[d]
+            blocked = self.wall_mask | boxes | ~self.pull_reachable
+            while tunnel >> end & 1 and not blocked >> (end + d) & 1:
+                end += d
+            if end != box + d and self._deadlocked(
+                    self.push(boxes, box, end - box), end):
+                continue
+            macro_moves.append((box, end - box))
+        return macro_moves
 
     def is_finished(self, boxes):
-        return len(self.goals.difference(boxes)) == 0
+        return self.goal_mask & ~boxes == 0
 
     def _detect_simple_deadlock(self):
         """Squares which can be visited by pulling from goals."""
-        stack = list(self.goals)
-        visited = set()
+        stack = list(bits(self.goal_mask))
+        visited = 0
 
         while stack:
             pos = stack.pop(0)
-            visited.add(pos)
+            visited |= 1 << pos
 
-            for d in DIRECTION:
+            for d in self.directions:
                 new_pos = pos + d
                 if any([
-                        new_pos in visited, new_pos in self.walls,
-                        new_pos + d in self.walls
+                        visited >> new_pos & 1, self.wall_mask >> new_pos & 1,
+                        self.wall_mask >> (new_pos + d) & 1
                 ]):
                     continue
                 else:
                     stack.append(new_pos)
         return visited
 
-    # def freeze_deadlock(self, boxes, player):
-    #     res = {}
+    def _push_distances(self):
+        """
+        Minimal number of pushes from every square to every goal, ignoring
+        the other boxes, found by pulling a box away from each goal.
+        Squares which can not reach a goal get `self.size`, which is larger
+        than any real distance.
+        """
+        dist = np.full((self.size, len(self.goal_list)), self.size, dtype=int)
+        for i, goal in enumerate(self.goal_list):
+            dist[goal, i] = 0
+            queue = deque([goal])
+            while queue:
+                pos = queue.popleft()
+                for d in self.directions:
+                    new_pos = pos + d
+                    if (self.wall_mask >> new_pos & 1
+                            or self.wall_mask >> (new_pos + d) & 1
+                            or dist[new_pos, i] <= dist[pos, i] + 1):
+                        continue
+                    dist[new_pos, i] = dist[pos, i] + 1
+                    queue.append(new_pos)
+        return dist
+
+    def freeze_deadlock(self, boxes, box):
+        """
+        Whether the box just pushed to `box` is frozen together with a box
+        which is not on a goal.
+        """
+        return self._frozen(boxes, box, 0) & ~self.goal_mask != 0
+
+    def _frozen(self, boxes, box, fixed):
+        """
+        Returns the boxes frozen together with `box`, or 0 if it can still
+        be moved. A box is frozen when it is blocked along both axes, by a
+        wall, by two dead squares or by another frozen box. Boxes in `fixed`
+        count as walls, which breaks cycles between neighbouring boxes.
+        """
+        fixed |= 1 << box
+        frozen = 1 << box
+        blocking = self.wall_mask | fixed
+        for a, b in self.axes:
+            p, q = box + a, box + b
+            if blocking >> p & 1 or blocking >> q & 1:
+                continue
+            if not (self.pull_reachable >> p & 1 or
+                    self.pull_reachable >> q & 1):
+                continue
+            for n in (p, q):
+                if boxes >> n & 1:
+                    sub = self._frozen(boxes, n, fixed)
+                    if sub:
+                        frozen |= sub
+                        break
+            else:
+                return 0
+        return frozen
+
+    def add_patterns(self, patterns):
+        """Registers deadlocked box patterns, given as bitmasks."""
+        for pattern in patterns:
+            for box in bits(pattern):
+                self.patterns[box].append(pattern)
+
+    def pattern_deadlock(self, boxes, box):
+        """Whether the box just pushed to `box` completes a known pattern."""
+        for pattern in self.patterns.get(box, ()):
+            if boxes & pattern == pattern:
+                return True
+        return False
+
+    def corral_deadlock(self, boxes, player, reach, max_nodes=1000):
+        """
+        Whether some closed area the player can not enter is unsolvable.
+
+        For each closed area, the boxes around it are searched alone, the
+        other boxes being removed. This only makes the player freer, so if
+        these boxes can neither all reach goals nor open the area, the state
+        is a deadlock. A search that hits `max_nodes` proves nothing.
+        """
+        closed = self.floor & ~(boxes | reach)
+        while closed:
+            area = self.reachable(boxes, (closed & -closed).bit_length() - 1)
+            closed &= ~area
+
+            border = 0
+            for d in self.directions:
+                border |= shift(area, d)
+            sub_boxes = border & boxes
+            if sub_boxes & ~self.goal_mask == 0:
+                continue
+            if self._corral_unsolvable(sub_boxes, player, area, max_nodes):
+                return True
+        return False
+
+    def _corral_unsolvable(self, boxes, player, area, max_nodes):
+        reach = self.reachable(boxes, player)
+        seen = {(boxes, (reach & -reach).bit_length() - 1)}
+        queue = deque([(boxes, reach)])
+        while queue:
+            boxes, reach = queue.popleft()
+            if reach & area or self.is_finished_subset(boxes):
+                return False
+            for box, d in self._pushes(boxes, reach):
+                new_boxes = self.push(boxes, box, d)
+                new_reach = self.reachable(new_boxes, box)
+                key = (new_boxes, (new_reach & -new_reach).bit_length() - 1)
+                if key in seen:
+                    continue
+                if len(seen) >= max_nodes:
+                    return False
+                seen.add(key)
+                queue.append((new_boxes, new_reach))
+        return True
+
+    def is_finished_subset(self, boxes):
+        return boxes & ~self.goal_mask == 0
 
     def print_board(self, boxes, player):
         """
@@ -98,7 +443,7 @@ class Board:
         """
         str_board = []
         for y in range(self.num_lines):
-            str_board.append([' '] * 20)  # 20 is an abitrary width
+            str_board.append([' '] * (self.width - 1))
 
         for wall in self.walls:  # walls
             str_board[wall.y][wall.x] = '#'
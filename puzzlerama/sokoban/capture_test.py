@@ -0,0 +1,43 @@
+import io
+import struct
+import unittest
+import numpy as np
+from capture import FrameReader, RGBA_8888
+
+
+def frame(pixels, colour_space=None):
+    """A raw screencap frame, with the Android 9 header if colour_space."""
+    height, width, _ = pixels.shape
+    header = struct.pack('<3I', width, height, RGBA_8888)
+    if colour_space is not None:
+        header += struct.pack('<I', colour_space)
+    return header + pixels.tobytes()
+
+
+class TestFrameReader(unittest.TestCase):
+    def setUp(self):
+        self.pixels = np.arange(3 * 5 * 4, dtype=np.uint8).reshape(3, 5, 4)
+
+    def test_single_frame(self):
+        for colour_space in (None, 1):
+            stream = io.BytesIO(frame(self.pixels, colour_space))
+            reader = FrameReader(stream)
+            np.testing.assert_array_equal(reader.read(), self.pixels)
+            self.assertEqual(reader.header_size,
+                             12 if colour_space is None else 16)
+
+    def test_several_frames(self):
+        other = self.pixels[::-1].copy()
+        data = frame(self.pixels, 1) + frame(other, 1)
+        with self.assertRaises(ValueError):
+            FrameReader(io.BytesIO(data)).read()
+
+        reader = FrameReader(io.BytesIO(data), header_size=16)
+        np.testing.assert_array_equal(reader.read(), self.pixels)
+        np.testing.assert_array_equal(reader.read(), other)
+        with self.assertRaises(EOFError):
+            reader.read()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,30 +4,95 @@ WALL = set(['#'])
 PLAYER = set(['@', '+'])
 GOAL = set(['.', '+', '*'])
 BOX = set(['$', '*'])
+MAP_CHARS = set('#@+$*. -_')
 
 
-def load_map(file_name):
-    walls, goals = set(), set()
-    boxes, player = set(), None
+def row_mask(line, chars):
+    """Bitmask of the characters of line which are in chars, x as bit x."""
+    return int(''.join('1' if char in chars else '0'
+                       for char in reversed(line)) or '0', 2)
+
+
+def parse_level(lines, **kwargs):
+    """
+    Builds a board, boxes and player from the rows of one level. The
+    flat-index masks are built a row at a time, without a `Position` per
+    square, and the board is as wide as its widest row of walls. Keyword
+    arguments go to `Board`.
+    """
+    width = max(line.rfind('#') for line in lines) + 2
+    wall_mask = goal_mask = box_mask = 0
+    player = None
+    for y, line in enumerate(lines):
+        offset = (y + 1) * width
+        wall_mask |= row_mask(line, WALL) << offset
+        goal_mask |= row_mask(line, GOAL) << offset
+        box_mask |= row_mask(line, BOX) << offset
+        for char in PLAYER:
+            if char in line:
+                player = Position(line.index(char), y)
+
+    board = Board.from_masks(len(lines), width, wall_mask, goal_mask,
+                             **kwargs)
+    return board, set(board.decode_set(box_mask)), player
 
+
+def load_map(file_name):
     with open(file_name, 'r') as f:
         num_lines = int(f.readline())
+        lines = [line.rstrip('\n') for line in f.readlines()][:num_lines]
+
+    return parse_level(lines)
+
+
+def is_map_line(line):
+    return '#' in line and set(line) <= MAP_CHARS
+
+
+def read_levels(file_name):
+    """
+    Yields the (title, rows) of every level of a multi-level .xsb/.sok
+    collection. Levels are runs of map rows. A `Title:` line after a level
+    names it, otherwise a `;` comment between two levels names the next
+    one, otherwise levels are numbered. The lines before the first level
+    are the header of the collection and are ignored.
+    """
+    title, rows = None, []
+    # The level just read, as [title, rows], until the next one starts.
+    done, count = None, 0
+    with open(file_name, 'r') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if is_map_line(line):
+                if done is not None:
+                    count += 1
+                    yield done[0] or str(count), done[1]
+                    done = None
+                rows.append(line)
+                continue
+
+            if rows:
+                done, title, rows = [title, rows], None, []
+            if done is None:
+                continue
+
+            text = line.strip()
+            if text.lower().startswith('title:'):
+                done[0] = text[6:].strip() or done[0]
+            elif text.startswith(';'):
+                title = title or text[1:].strip() or None
+
+    if rows:
+        done = [title, rows]
+    if done is not None:
+        count += 1
+        yield done[0] or str(count), done[1]
+
 
-        for y, line in enumerate(f.readlines()):
-            if line:
-                for x, char in enumerate(line):
-                    pos = Position(x, y)
-
-                    if char in WALL:
-                        walls.add(pos)
-                    if char in GOAL:
-                        goals.add(pos)
-                    if char in BOX:
-                        boxes.add(pos)
-                    if char in PLAYER:
-                        player = pos
-            else:
-                break
-
-    board = Board(num_lines, walls, goals)
-    return board, boxes, player
+def load_levels(file_name, **kwargs):
+    """
+    Yields the (title, board, boxes, player) of every level of a .xsb/.sok
+    collection, parsing each level only when it is asked for.
+    """
+    for title, rows in read_levels(file_name):
+        yield (title, ) + parse_level(rows, **kwargs)
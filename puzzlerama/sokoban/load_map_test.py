@@ -0,0 +1,34 @@
+import os
+import tempfile
+import unittest
+from load_map import read_levels
+
+LEVEL_1 = ['#####', '#@$.#', '#####']
+LEVEL_2 = ['######', '#@ $.#', '######']
+LEVEL_3 = ['####', '#@ #', '#$.#', '####']
+
+
+class TestReadLevels(unittest.TestCase):
+    def read(self, lines):
+        with tempfile.TemporaryDirectory() as tmp:
+            file_name = os.path.join(tmp, 'levels.sok')
+            with open(file_name, 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+            return list(read_levels(file_name))
+
+    def test_titles_after_levels(self):
+        levels = self.read(['Title: My Pack', 'Author: Someone', ''] +
+                           LEVEL_1 + ['Title: First', ''] + LEVEL_2 +
+                           ['Title: Second', 'Author: Someone'])
+        self.assertEqual(levels, [('First', LEVEL_1), ('Second', LEVEL_2)])
+
+    def test_comments_and_numbers(self):
+        levels = self.read(['; My Pack', ''] + LEVEL_1 + ['', '; Two', ''] +
+                           LEVEL_2 + ['Title: Second', '', '; Three'] +
+                           LEVEL_3)
+        self.assertEqual(levels, [('1', LEVEL_1), ('Second', LEVEL_2),
+                                  ('Three', LEVEL_3)])
+
+
+if __name__ == '__main__':
+    unittest.main()
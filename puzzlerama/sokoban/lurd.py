@@ -0,0 +1,163 @@
+"""
+Full player walks in LURD notation.
+
+The searches only record pushes. A walk spells out every step of the
+player: `l`, `u`, `r`, `d` for a step left, up, right or down and `L`, `U`,
+`R`, `D` for a push. Between two pushes the player takes a shortest path,
+found by a breadth-first search over the free squares, backwards from the
+square of the next push. These tables only depend on the boxes and that
+square, so they are cached and shared by every player square.
+
+    python lurd.py maps/hard.txt
+"""
+import sys
+from collections import deque
+from heapq import heappush, heappop
+from itertools import count
+from math import inf
+
+from board import Position
+from algorithms.Astar import heuristic
+
+STEPS = 'udrl'  # in the order of board.directions
+
+
+class Walker:
+    """
+    Shortest player walks on `board`. At most `max_tables` walk tables are
+    kept; the cache is emptied when it is full.
+    """
+
+    def __init__(self, board, max_tables=10000):
+        self.board = board
+        self.max_tables = max_tables
+        self.tables = dict()
+
+    def table(self, boxes, target):
+        """
+        Every square from which the player can walk to target, mapped to
+        its distance and the next square on a shortest path. States with
+        the same boxes and different player squares share these tables.
+        """
+        key = (boxes, target)
+        if key not in self.tables:
+            if len(self.tables) >= self.max_tables:
+                self.tables.clear()
+            blocked = self.board.wall_mask | boxes
+            table = {target: (0, None)}
+            queue = deque([target])
+            while queue:
+                pos = queue.popleft()
+                dist = table[pos][0] + 1
+                for d in self.board.directions:
+                    new_pos = pos + d
+                    if blocked >> new_pos & 1 or new_pos in table:
+                        continue
+                    table[new_pos] = (dist, pos)
+                    queue.append(new_pos)
+            self.tables[key] = table
+        return self.tables[key]
+
+    def walk(self, boxes, player, target):
+        """Steps from player to target, or None if it can not be reached."""
+        table = self.table(boxes, target)
+        if player not in table:
+            return None
+        steps = []
+        while player != target:
+            next_pos = table[player][1]
+            steps.append(STEPS[self.board.directions.index(next_pos - player)])
+            player = next_pos
+        return ''.join(steps)
+
+    def expand(self, boxes, player, pushes):
+        """
+        LURD walk of a list of single pushes (box index, direction offset),
+        from the encoded state (boxes, player).
+        """
+        res = []
+        for box, d in pushes:
+            steps = self.walk(boxes, player, box - d)
+            if steps is None:
+                raise ValueError(f'push {self.board.position(box)} '
+                                 'can not be reached')
+            res.append(steps + STEPS[self.board.directions.index(d)].upper())
+            boxes = self.board.push(boxes, box, d)
+            player = box
+        return ''.join(res)
+
+    def min_moves(self, boxes, player, num_pushes):
+        """
+        Pushes of a solution with `num_pushes` pushes and the fewest player
+        moves among those, by a uniform cost search over exact player squares
+        ordered by (pushes, moves). States which can not reach the goals in
+        `num_pushes` pushes according to the heuristic are pruned.
+        """
+        board = self.board
+        hscores = dict()
+        counter = count()
+        start = (boxes, player)
+        best = {start: (0, 0)}
+        parents = dict()
+        heap = [(0, 0, next(counter), start)]
+
+        while heap:
+            num, moves, _, state = heappop(heap)
+            if best[state] < (num, moves):
+                continue
+            boxes, player = state
+            if board.is_finished(boxes):
+                pushes = []
+                while state in parents:
+                    state, move = parents[state]
+                    pushes.extend(reversed(board.unit_pushes(*move)))
+                return pushes[::-1]
+
+            for box, d in board.moves_available(boxes, player)[0]:
+                unit = board.unit[d]
+                new_num = num + board.push_count(d)
+                new_boxes = board.push(boxes, box, d)
+                if new_boxes not in hscores:
+                    hscores[new_boxes] = heuristic(board, new_boxes)
+                if new_num + hscores[new_boxes] > num_pushes:
+                    continue
+
+                walk = self.table(boxes, box - unit)[player][0]
+                new_moves = moves + walk + board.push_count(d)
+                new_state = (new_boxes, board.player_after(box, d))
+                if best.get(new_state, (inf, inf)) <= (new_num, new_moves):
+                    continue
+                best[new_state] = (new_num, new_moves)
+                parents[new_state] = (state, (box, d))
+                heappush(heap, (new_num, new_moves, next(counter), new_state))
+
+
+def lurd(board, boxes, player, pushes, min_moves=False):
+    """
+    LURD walk of a solution given as [x, y, dx, dy] pushes from the start
+    (boxes, player), as made by `solutions.pushes`. With `min_moves`, the
+    walk is that of a solution with as many pushes and the fewest moves.
+    """
+    walker = Walker(board)
+    boxes, player = board.encode(boxes, player)
+    moves = []
+    for x, y, dx, dy in pushes:
+        box = board.index(Position(x, y))
+        moves.append((box, board.index(Position(x + dx, y + dy)) - box))
+    if min_moves:
+        moves = walker.min_moves(boxes, player, len(moves))
+    return walker.expand(boxes, player, moves)
+
+
+if __name__ == '__main__':
+    from load_map import load_map
+    from solutions import pushes
+    from algorithms.Astar import Astar_search
+
+    board, boxes, player = load_map(sys.argv[1])
+    path = Astar_search(board, boxes, player)
+    walk = lurd(board, boxes, player, pushes(board, path, 'Astar'))
+    print(walk, len(walk))
+    walk = lurd(board, boxes, player, pushes(board, path, 'Astar'),
+                min_moves=True)
+    print(walk, len(walk))
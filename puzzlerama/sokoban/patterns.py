@@ -0,0 +1,126 @@
+"""
+Deadlock pattern database.
+
+A pattern is a small set of boxes lying in a local window of the board. It
+is a deadlock if, with every other box removed, the boxes of the pattern can
+neither all reach goals nor leave the window, from any player position.
+Removing boxes only makes the player freer, so a board containing such a
+pattern is a deadlock whatever the other boxes are.
+
+Patterns depend only on the walls and the goals, so they are computed once
+per map and cached on disk, one file per map, named after a hash of the map
+and holding one hexadecimal bitmask per line.
+"""
+import os
+from collections import deque
+from hashlib import sha1
+from itertools import combinations
+
+from board import bits
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         'patterns')
+
+
+def map_hash(board):
+    key = f'{board.width}:{board.wall_mask:x}:{board.goal_mask:x}'
+    return sha1(key.encode()).hexdigest()
+
+
+def window_squares(board, pattern):
+    """Squares of the bounding box of pattern, grown by one square."""
+    xs = [box % board.width for box in bits(pattern)]
+    ys = [box // board.width for box in bits(pattern)]
+    window = 0
+    for y in range(min(ys) - 1, max(ys) + 2):
+        for x in range(min(xs) - 1, max(xs) + 2):
+            idx = y * board.width + x
+            if 0 <= idx < board.size:
+                window |= 1 << idx
+    return window
+
+
+def is_deadlock(board, pattern, max_nodes=500):
+    """
+    Searches the pushes of the pattern boxes alone, from every player area.
+    Returns False as soon as the boxes all reach goals or one leaves the
+    window, or the search grows past `max_nodes` states.
+    """
+    window = window_squares(board, pattern)
+    seen = set()
+    free = board.floor & ~pattern
+    while free:
+        player = (free & -free).bit_length() - 1
+        reach = board.reachable(pattern, player)
+        free &= ~reach
+
+        queue = deque([(pattern, reach)])
+        seen.add((pattern, (reach & -reach).bit_length() - 1))
+        while queue:
+            boxes, reach = queue.popleft()
+            if boxes & ~board.goal_mask == 0 or boxes & ~window:
+                return False
+            for box, d in board._pushes(boxes, reach):
+                new_boxes = board.push(boxes, box, d)
+                new_reach = board.reachable(new_boxes, box)
+                key = (new_boxes, (new_reach & -new_reach).bit_length() - 1)
+                if key in seen:
+                    continue
+                if len(seen) >= max_nodes:
+                    return False
+                seen.add(key)
+                queue.append((new_boxes, new_reach))
+    return True
+
+
+def build_patterns(board, max_boxes=4, size=3):
+    """
+    Enumerates the patterns of 2 to `max_boxes` boxes on live squares of
+    every `size` x `size` window and keeps the minimal deadlocked ones.
+    """
+    live = board.floor & board.pull_reachable
+    windows = set()
+    for top in range(board.size // board.width):
+        for left in range(board.width - size + 1):
+            window = 0
+            for y in range(top, top + size):
+                for x in range(left, left + size):
+                    window |= 1 << (y * board.width + x)
+            if window & live:
+                windows.add(window & live)
+
+    patterns = []
+    for num_boxes in range(2, max_boxes + 1):
+        candidates = set()
+        for window in windows:
+            for boxes in combinations(bits(window), num_boxes):
+                pattern = sum(1 << box for box in boxes)
+                if pattern & ~board.goal_mask == 0:
+                    continue
+                if any(pattern & known == known for known in patterns):
+                    continue
+                candidates.add(pattern)
+
+        found = [p for p in sorted(candidates) if is_deadlock(board, p)]
+        # Patterns found here are used to prune the searches of larger ones.
+        board.add_patterns(found)
+        patterns.extend(found)
+    return patterns
+
+
+def load_patterns(board, max_boxes=4, cache_dir=CACHE_DIR):
+    """
+    Loads the patterns of board from the cache, building and saving them
+    first if needed, and registers them with `board.add_patterns`.
+    """
+    file_name = os.path.join(cache_dir, f'{map_hash(board)}-{max_boxes}.txt')
+    if os.path.exists(file_name):
+        with open(file_name, 'r') as f:
+            patterns = [int(line, 16) for line in f if line.strip()]
+        board.add_patterns(patterns)
+    else:
+        patterns = build_patterns(board, max_boxes)
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(file_name, 'w') as f:
+            f.write(''.join(f'{pattern:x}\n' for pattern in patterns))
+    return patterns
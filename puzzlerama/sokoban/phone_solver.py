@@ -4,9 +4,27 @@ import numpy as np
 from PIL import Image
 
 from board import Position, Board
-from algorithms.Astar import Astar_search
+from lurd import lurd
+from capture import Screen
+from patterns import load_patterns
+from solutions import pushes, load_solution, save_solution, replay
+from algorithms.Astar import Astar_anytime
 
 LENGTH = 86
+# Seconds allowed to improve on the first, weighted A* solution.
+TIME_LIMIT = 5
+
+# Mean BGR colours of a wall and of a box on a goal.
+WALL_COLOR = np.array([159, 225, 254])
+BOX_ON_GOAL_COLOR = np.array([195, 135, 235])
+# Summed standard deviation of the channels under which a square is a flat
+# colour, too plain to hold the circle of a goal or of the player. Checked
+# on the capture images/out_001.png and on synthetic screens, see
+# phone_solver_test.py.
+FLAT = 30
+
+# The `Screen` of get_image, opened on first use.
+SCREEN = None
 
 
 def image_save(i):
@@ -18,22 +36,32 @@ def image_save(i):
     image.save(f'images/out_{file_index}.png')
 
 
-def get_image():
-    command = "adb shell screencap -p"
-    proc = subprocess.Popen(command, stdout=subprocess.PIPE, shell=True)
-    out = proc.stdout.read()
-    img = cv2.imdecode(np.frombuffer(out, np.uint8), cv2.IMREAD_COLOR)
-    img = img[300:-200]
-    return img
-
-
-def get_squares(img):
+def get_image(screen=None):
+    """
+    The screen as a BGR image, without its top and bottom bars. Frames come
+    from `screen`, by default one `Screen` kept open for the whole run.
+    """
+    global SCREEN
+    if screen is None:
+        if SCREEN is None:
+            SCREEN = Screen()
+        screen = SCREEN
+    frame = screen.capture()
+    return cv2.cvtColor(frame[300:-200], cv2.COLOR_RGBA2BGR)
+
+
+def get_rect(img):
+    """
+    The grid of the level, as its top-left corner and its number of columns
+    and rows: the bounding box of the largest bright contour.
+    """
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
     # threshold image
     ret, threshed_img = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY)
-    # find contours and get the external one
-    _, contours, hier = cv2.findContours(threshed_img, cv2.RETR_TREE,
-                                         cv2.CHAIN_APPROX_SIMPLE)
+    # find contours and get the external one; OpenCV 3 returns the image
+    # first, later versions only the contours and the hierarchy
+    contours = cv2.findContours(threshed_img, cv2.RETR_TREE,
+                                cv2.CHAIN_APPROX_SIMPLE)[-2]
 
     max_area = 0
     max_rect = None
@@ -44,20 +72,11 @@ def get_squares(img):
             max_rect = (x, y, w, h)
 
     x_0, y_0, w, h = max_rect
-    m1, m2 = round(w / LENGTH), round(h / LENGTH)
-    squares = [[None for _ in range(m1)] for _ in range(m2)]
-    for i in np.arange(m1):
-        x = i * LENGTH + x_0
-        for j in np.arange(m2):
-            y = j * LENGTH + y_0
-            squares[j][i] = img[y:y + LENGTH, x:x + LENGTH]
+    return x_0, y_0, round(w / LENGTH), round(h / LENGTH)
 
-    return squares
 
-
-def detect(square):
-    if np.abs(square.mean(axis=(0, 1)) - np.array([159, 225, 254])).sum() < 24:
-        return "#"
+def detect_circle(square):
+    """'.' for a goal, '@' for the player, None if there is no circle."""
     circles = cv2.HoughCircles(
         square[:, :, 1], cv2.HOUGH_GRADIENT, 1, 50, param1=80, param2=30)
     if circles is not None:
@@ -71,23 +90,35 @@ def detect(square):
         elif len(circles[0]) > 1:
             raise Exception('Detect two circle!')
 
-    if (square.mean(axis=(0, 1)) > 200).all():
-        return '$'
-
-    if np.abs(square.mean(axis=(0, 1)) - np.array([195, 135, 235])).sum() < 24:
-        return "*"
 
-    # edges = cv2.Canny(square[:, :, 1], 25, 54)
-    # lines = cv2.HoughLines(edges, 1, np.pi / 180, 100)
-    # if lines is not None:
-    #     if len(lines[0]) == 1:
-    #         if abs(lines[0][0][1] - 2.356) > 0.05:
-    #             raise Exception('Detect a strange line!')
-    #         return '*'
-    #     elif len(lines[0]) > 1:
-    #         raise Exception('Detect two lines!')
-
-    return ' '
+def detect_grid(img):
+    """
+    The level as rows of map characters. Squares are told apart by their
+    mean colour, computed for all of them from one reshaped array: walls,
+    boxes on goals, and boxes, which are brighter than 200 on every
+    channel. Goals and the player are circles, only looked for in squares
+    which are neither walls nor flat colours.
+    """
+    x_0, y_0, m1, m2 = get_rect(img)
+    grid = np.zeros((m2 * LENGTH, m1 * LENGTH, 3), img.dtype)
+    crop = img[y_0:y_0 + m2 * LENGTH, x_0:x_0 + m1 * LENGTH]
+    grid[:crop.shape[0], :crop.shape[1]] = crop
+    cells = grid.reshape(m2, LENGTH, m1, LENGTH, 3)
+
+    means = cells.mean(axis=(1, 3))
+    spread = cells.std(axis=(1, 3)).sum(axis=-1)
+    wall = np.abs(means - WALL_COLOR).sum(axis=-1) < 24
+
+    chars = np.full((m2, m1), ' ')
+    chars[np.abs(means - BOX_ON_GOAL_COLOR).sum(axis=-1) < 24] = '*'
+    chars[(means > 200).all(axis=-1)] = '$'
+    chars[wall] = '#'
+
+    for j, i in zip(*np.nonzero(~wall & (spread >= FLAT))):
+        char = detect_circle(cells[j, :, i])
+        if char is not None:
+            chars[j, i] = char
+    return [''.join(line) for line in chars]
 
 
 WALL = set(['#'])
@@ -98,16 +129,15 @@ BOX = set(['$', '*'])
 
 def main():
     img = get_image()
-    squares = get_squares(img)
+    rows = detect_grid(img)
 
     walls, goals = set(), set()
     boxes, player = set(), None
 
-    num_lines = len(squares)
+    num_lines = len(rows)
 
-    for y, line in enumerate(squares):
-        for x, s in enumerate(line):
-            char = detect(s)
+    for y, line in enumerate(rows):
+        for x, char in enumerate(line):
             pos = Position(x, y)
 
             if char in WALL:
@@ -123,11 +153,25 @@ def main():
         goals.add(player)
 
     board = Board(num_lines, walls, goals)
+    load_patterns(board)
     board.print_board(boxes, player)
 
-    path = Astar_search(board, boxes, player)
+    solution = load_solution(board, boxes, player)
+    if solution is None:
+        path = None
+        for path in Astar_anytime(board, boxes, player,
+                                  max_seconds=TIME_LIMIT):
+            pass
+        if path is None:
+            print('No solution found.')
+            return
+        solution = pushes(board, path, 'Astar')
+        save_solution(board, boxes, player, solution)
+    print(lurd(board, boxes, player, solution))
+    input()
+
     idx = 0
-    for boxes, player in path[::-1]:
+    for boxes, player in replay(boxes, player, solution):
         idx += 1
         subprocess.call('clear')
         board.print_board(boxes, player)
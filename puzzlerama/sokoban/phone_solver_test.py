@@ -0,0 +1,63 @@
+import unittest
+import cv2
+import numpy as np
+from phone_solver import (detect_grid, LENGTH, WALL_COLOR,
+                          BOX_ON_GOAL_COLOR)
+
+# BGR colours of a synthetic screen, not taken from the game: the floor and
+# boxes are brighter than the threshold of `get_rect`, goals and the player
+# are thin circles of the radii `detect_circle` expects.
+FLOOR = (120, 230, 240)
+BOX = (230, 230, 230)
+CIRCLE = (40, 80, 160)
+
+
+def draw(rows, margin=40):
+    height, width = len(rows) * LENGTH, len(rows[0]) * LENGTH
+    img = np.zeros((height + 2 * margin, width + 2 * margin, 3), np.uint8)
+    for j, line in enumerate(rows):
+        for i, char in enumerate(line):
+            x, y = margin + i * LENGTH, margin + j * LENGTH
+            square = img[y:y + LENGTH, x:x + LENGTH]
+            square[:] = FLOOR
+            if char == '#':
+                square[:] = WALL_COLOR
+            elif char == '$':
+                square[:] = BOX
+            elif char == '*':
+                square[:] = BOX_ON_GOAL_COLOR
+            elif char in '.@':
+                radius = 22 if char == '.' else 37
+                cv2.circle(square, (LENGTH // 2, LENGTH // 2), radius,
+                           CIRCLE, 2)
+    return img
+
+
+class TestDetectGrid(unittest.TestCase):
+    def test_synthetic_level(self):
+        rows = [
+            '######',
+            '#  . #',
+            '# $* #',
+            '#  @ #',
+            '######',
+        ]
+        self.assertEqual(detect_grid(draw(rows)), rows)
+
+    def test_capture(self):
+        # A capture of the game, as saved by `image_save`.
+        img = cv2.imread('images/out_001.png')
+        self.assertEqual(detect_grid(img), [
+            ' #######  ',
+            ' #     ###',
+            '## ###$  #',
+            '#  .. $  #',
+            '#  .##$ ##',
+            '### # @## ',
+            '  #   ##  ',
+            '  #####   ',
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Compares the open set backends of A* on recorded traces.
+
+A trace is the sequence of add, pop and decreaseKey calls made by
+`Astar_search` on a map; it is replayed against every backend in `QUEUES`
+and the throughput of each operation is reported.
+
+    python queue_benchmark.py maps/hard.txt maps/pkuhelper.txt
+"""
+import sys
+from glob import glob
+from time import perf_counter
+
+from load_map import load_map
+from algorithms.Astar import Astar_search, QUEUES
+from algorithms.Aaster_fibonacci_heap import FibonacciHeap
+
+
+def record(file_name):
+    trace = []
+
+    class RecordingHeap(FibonacciHeap):
+        def add(self, *args):
+            trace.append(('add', args))
+            super().add(*args)
+
+        def pop(self):
+            trace.append(('pop', ()))
+            return super().pop()
+
+        def decreaseKey(self, key, gscore):
+            trace.append(('decreaseKey', (key, gscore)))
+            super().decreaseKey(key, gscore)
+
+    board, boxes, player = load_map(file_name)
+    Astar_search(board, boxes, player, queue=RecordingHeap)
+    return trace
+
+
+def replay(queue, trace):
+    heap = queue()
+    elapsed = {'add': 0.0, 'pop': 0.0, 'decreaseKey': 0.0}
+    counts = {'add': 0, 'pop': 0, 'decreaseKey': 0}
+    for op, args in trace:
+        method = getattr(heap, op)
+        start = perf_counter()
+        method(*args)
+        elapsed[op] += perf_counter() - start
+        counts[op] += 1
+    return elapsed, counts
+
+
+def main(file_names):
+    for file_name in file_names:
+        trace = record(file_name)
+        print(f'{file_name}: {len(trace)} operations')
+        for name, queue in QUEUES.items():
+            elapsed, counts = replay(queue, trace)
+            rates = ', '.join(
+                f'{op} {counts[op] / elapsed[op]:,.0f}/s' if elapsed[op] else
+                f'{op} -' for op in elapsed)
+            print(f'    {name:<10} {sum(elapsed.values()):.3f}s  {rates}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or sorted(glob('maps/*.txt')))
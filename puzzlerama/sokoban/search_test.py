@@ -0,0 +1,72 @@
+import unittest
+from load_map import load_map, parse_level
+from lurd import lurd
+from solutions import pushes, replay
+from algorithms.Astar import Astar_search
+from algorithms.bidirectional import bidirectional_search
+from algorithms.idastar import IDAstar_search
+from algorithms.hdastar import HDAstar_search
+
+
+class TestWeightedAstar(unittest.TestCase):
+    def setUp(self):
+        self.board, self.boxes, self.player = load_map('maps/example.txt')
+
+    def search(self, weight):
+        stats = dict()
+        path = Astar_search(self.board, self.boxes, self.player,
+                            weight=weight, stats=stats)
+        return path, stats
+
+    def test_weighted_expands_less(self):
+        optimal, stats = self.search(1)
+        for weight in (2, 3):
+            path, weighted = self.search(weight)
+            self.assertLessEqual(weighted['expanded'], stats['expanded'])
+            self.assertLessEqual(len(path) - 1, weight * (len(optimal) - 1))
+
+
+class OptimalSearch:
+    """Checks that a search finds solutions as short as `Astar_search`."""
+
+    maps = ('example', 'hard')
+
+    def check(self, search):
+        for name in self.maps:
+            board, boxes, player = load_map(f'maps/{name}.txt')
+            num_pushes = len(Astar_search(board, boxes, player)) - 1
+            path = search(board, boxes, player)
+            self.assertEqual(path[-1][0], frozenset(boxes))
+            solution = pushes(board, path, 'Astar')
+            self.assertEqual(len(solution), num_pushes, name)
+            # Raises if the player can not reach one of the pushes.
+            lurd(board, boxes, player, solution)
+            self.assertEqual(replay(boxes, player, solution)[-1][0],
+                             board.goals)
+
+
+class TestBidirectional(OptimalSearch, unittest.TestCase):
+    def test_solutions(self):
+        self.check(bidirectional_search)
+
+
+class TestIDAstar(OptimalSearch, unittest.TestCase):
+    def test_solutions(self):
+        self.check(IDAstar_search)
+
+    def test_long_solution(self):
+        # Deeper than the recursion limit.
+        board, boxes, player = parse_level(
+            ['#' * 1204, '#@$' + ' ' * 1199 + '.#', '#' * 1204])
+        self.assertEqual(len(IDAstar_search(board, boxes, player)), 1201)
+
+
+class TestHDAstar(OptimalSearch, unittest.TestCase):
+    def test_solutions(self):
+        for workers in (1, 4):
+            self.check(lambda board, boxes, player: HDAstar_search(
+                board, boxes, player, workers=workers))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Solution cache.
+
+Solutions are stored on disk, one file per level, named after a hash of the
+walls, the goals, the boxes and the normalized player position, so any
+player square of the same access area finds the same file. A file holds
+one push per line as `x y dx dy`, from the start, as made by `pushes`.
+"""
+import os
+from hashlib import sha1
+
+from board import Position
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         'solutions')
+
+
+def level_hash(board, boxes, player):
+    boxes, player = board.encode(boxes, player)
+    reach = board.reachable(boxes, player)
+    norm_pos = (reach & -reach).bit_length() - 1
+    key = (f'{board.width}:{board.wall_mask:x}:{board.goal_mask:x}:'
+           f'{boxes:x}:{norm_pos}')
+    return sha1(key.encode()).hexdigest()
+
+
+def load_solution(board, boxes, player, cache_dir=CACHE_DIR):
+    """The cached [x, y, dx, dy] pushes of the level, or None."""
+    file_name = os.path.join(cache_dir,
+                             f'{level_hash(board, boxes, player)}.txt')
+    if not os.path.exists(file_name):
+        return None
+    with open(file_name, 'r') as f:
+        return [[int(v) for v in line.split()] for line in f if line.strip()]
+
+
+def save_solution(board, boxes, player, pushes, cache_dir=CACHE_DIR):
+    """
+    Stores the [x, y, dx, dy] pushes of the level, unless a solution with
+    no more pushes is already cached.
+    """
+    old = load_solution(board, boxes, player, cache_dir)
+    if old is not None and len(old) <= len(pushes):
+        return
+    file_name = os.path.join(cache_dir,
+                             f'{level_hash(board, boxes, player)}.txt')
+    os.makedirs(cache_dir, exist_ok=True)
+    # Written aside and renamed, so that a reader never sees half a file.
+    tmp_name = f'{file_name}.{os.getpid()}'
+    with open(tmp_name, 'w') as f:
+        f.write(''.join(' '.join(map(str, push)) + '\n' for push in pushes))
+    os.replace(tmp_name, file_name)
+
+
+def pushes(board, path, algorithm):
+    """Solution as a list of [x, y, dx, dy] pushes, from the start."""
+    if algorithm != 'Astar':
+        return [[pos.x, pos.y, d.x, d.y] for pos, d in path]
+
+    # With tunnel macros a box may move several squares between states.
+    states = [boxes for boxes, _ in path[::-1]]
+    res = []
+    for old, new in zip(states, states[1:]):
+        (src, ), (dst, ) = old - new, new - old
+        num = src.dist(dst)
+        dx, dy = (dst.x - src.x) // num, (dst.y - src.y) // num
+        for k in range(num):
+            res.append([src.x + k * dx, src.y + k * dy, dx, dy])
+    return res
+
+
+def replay(boxes, player, pushes):
+    """The (boxes, player) states along the pushes, from the start."""
+    boxes = frozenset(boxes)
+    states = [(boxes, player)]
+    for x, y, dx, dy in pushes:
+        player = Position(x, y)
+        boxes = boxes - {player} | {Position(x + dx, y + dy)}
+        states.append((boxes, player))
+    return states